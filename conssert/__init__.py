@@ -9,24 +9,91 @@ import operator
 import sys
 
 from conssert.navigate import *
+from conssert.index import PathIndex, FilterIndex
+from conssert.sampling import reservoir_sample, sample_size, wilson_interval
+from conssert.sketches import HyperLogLog, duplicates
+from conssert.locate import locate, item_locations
+from conssert.join import key_set, key_getter, hash_table, group_counts
+from conssert.codegen import evaluator
 
 
 _identity = lambda x: x
 
+# maximum number of failing elements whose location is reported
+MAX_LOCATED_FAILURES = 10
+
+
+class _Snapshot(object):
+    # keeps the snapshot from being compared item by item as dicts and lists are
+    def __init__(self, value):
+        self.value = value
+
 
 class Assertable(object):
     """
     Context manager for object's content validation.
     """
 
-    def __init__(self, data, prefix_path=[]):
+    def __init__(self, data, prefix_path=[], normalize=True, index=False, codegen=False):
         """
         Args:
             data (dict, list): object under test.
             prefix_path (str, list): path of the object tree under test.
+            normalize (bool): if False, data must be already normalized by to_dict.
+            index (bool): if True, an index of the object tree is built on the first '**' lookup
+            and used by all the later ones, instead of walking the tree on every lookup.
+            '..key' lookups always build and use the index.
+            codegen (bool): if True, comparisons are verified by Python functions generated for
+            their plan (see conssert.codegen) instead of the generic comparison layers.
         """
-        self._data = to_dict(data)
+        self._data = to_dict(data) if normalize else data
         self._prefix_path = prefix_path if is_list(prefix_path) else prefix_path.split()
+        self._memo = None
+        self._prefix_cache = None
+        self._indexed = index
+        self._index = None
+        self._filter_index = FilterIndex()
+        self._canonical = Canonicalizer()
+        self._codegen = codegen
+
+    @staticmethod
+    def from_frame(frame, prefix_path=[]):
+        """
+        Returns an Assertable over a pandas DataFrame, standing for the list of its rows, or
+        Series, verifying validations on columns with vectorized operations where possible
+        (see conssert.frames).
+        """
+        from conssert.frames import FrameAssertable
+        return FrameAssertable(frame, prefix_path)
+
+    @staticmethod
+    def from_arrow(table, prefix_path=[]):
+        """
+        Returns an Assertable over a pyarrow Table, standing for the list of its rows, reading
+        only the columns the validations need (see conssert.arrow).
+        """
+        from conssert.arrow import ArrowAssertable
+        return ArrowAssertable(table, prefix_path)
+
+    @staticmethod
+    def from_parquet(path, prefix_path=[]):
+        """
+        Returns an Assertable over the Parquet file in path, standing for the list of its rows,
+        reading only the columns the validations need and the row groups their filters may
+        select (see conssert.arrow).
+        """
+        from conssert.arrow import ArrowAssertable, parquet
+        return ArrowAssertable(parquet.ParquetFile(path), prefix_path)
+
+    @staticmethod
+    def from_sqlite(connection, table="records", prefix_path=[]):
+        """
+        Returns an Assertable over the JSON documents stored in a SQLite table (see
+        conssert.sqlite.load), standing for the list of the documents, that filters and counts
+        the selected values in SQL where possible.
+        """
+        from conssert.sqlite import SQLiteAssertable
+        return SQLiteAssertable(connection, table, prefix_path)
 
     def __enter__(self):
         return self
@@ -40,8 +107,10 @@ class Assertable(object):
         Validations performed on it must hold true for the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         selector = self._build_selector(split_and_reduce(path),
                                         min_checks=1,
@@ -49,32 +118,47 @@ class Assertable(object):
                                         wrap=True)
         return selector
 
-    def every_existent(self, *path):
+    def every_existent(self, *path, **sampling):
         """
         Returns a selection/view of the assertable object specified by path.
         Validations performed on it must hold true for all the elements in the selection.
         It does not fail if the path does not exist for all the elements in the object tree.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
+        Sampling options, to verify the validations on a random subset of big selections:
+            sample: number of elements reservoir-sampled from the selection.
+            error_rate: instead of sample, the rate of failing elements that must be detected with
+            the given confidence (0.95 by default).
+            seed: seed of the random sampling.
         """
-        selector = self._build_selector(split_and_reduce(path), min_checks=None)
+        selector = self._build_selector(split_and_reduce(path), min_checks=None, sampling=sampling)
         return selector
 
-    def every(self, *path):
+    def every(self, *path, **sampling):
         """
         Returns a selection/view of the assertable object specified by path.
         Validations performed on it must hold true for all the elements in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
         The path must exists for all the elements in the object tree.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
+        Sampling options, to verify the validations on a random subset of big selections:
+            sample: number of elements reservoir-sampled from the selection.
+            error_rate: instead of sample, the rate of failing elements that must be detected with
+            the given confidence (0.95 by default).
+            seed: seed of the random sampling.
         """
         selector = self._build_selector(split_and_reduce(path),
                                         min_checks=None,
-                                        force_path_present=True)
+                                        force_path_present=True,
+                                        sampling=sampling)
         return selector
 
     def exactly(self, num_checks, *path):
@@ -83,8 +167,10 @@ class Assertable(object):
         Validations performed on it must hold true for exactly num_checks elements in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         selector = self._build_selector(split_and_reduce(path),
                                         min_checks=num_checks,
@@ -98,8 +184,10 @@ class Assertable(object):
         selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         selector = self._build_selector(split_and_reduce(path), min_checks=num_checks)
         return selector
@@ -110,8 +198,10 @@ class Assertable(object):
         Validations performed on it must hold true for at most num_checks elements in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         selector = self._build_selector(split_and_reduce(path), max_checks=num_checks + 1)
         return selector
@@ -122,8 +212,10 @@ class Assertable(object):
         Validations performed on it must hold true for exactly one elements in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         return self.exactly(1, split_and_reduce(path))
 
@@ -133,8 +225,10 @@ class Assertable(object):
         Validations performed on it must hold true for at least one element in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         return self.at_least(1, split_and_reduce(path))
 
@@ -144,53 +238,213 @@ class Assertable(object):
         Validations performed on it must hold false for all the elements in the selection.
         path might be a string or a list of strings and/or tuples with 2 elements,
         namely a key and a value.
-        If tuple, selection will be filtered by given key(s) and value(s).
+        If tuple, selection will be filtered by given key(s) and value(s), or by (key, operator,
+        value) filters, e.g: ('year', '>', 1970) (see navigate.filter_nodes).
         '*' in the path expands the next level in the selection, and '**' expands recursively.
+        '..key' in the path selects the values stored under key at any depth.
         """
         return self.at_most(0, split_and_reduce(path))
 
+    def references(self, child_path, parent_path):
+        """
+        Asserts that every element selected by child_path is equal to some element selected by
+        parent_path, e.g: references('orders user_id', 'users id').
+        The parent elements are hashed once and every child element is looked up in them, instead
+        of selecting the parents once per child. The dangling child elements are reported.
+        """
+        parents = key_set(self.every_existent(parent_path)._elements, self._canonical)
+        self.every_existent(child_path)._verify_each(
+            lambda element: self._canonical(element) in parents,
+            "references to {}".format(parent_path))
+
+    def matches_join(self, left_path, right_path, on, check=None, right_on=None):
+        """
+        Joins every record selected by left_path with the records selected by right_path having
+        the same value of on (a key, or a list of keys), or of right_on in the right records.
+        Asserts that every left record has some match and, if check is given, that
+        check(left_record, right_record) is True for all its matches, e.g:
+            matches_join('orders', 'users', 'user_id', right_on='id',
+                         check=lambda order, user: order['country'] == user['country'])
+        The right records are hashed once by key, so the join runs in a single pass over each
+        side. The left records not verifying it are reported.
+        """
+        left_key = key_getter(on, self._canonical)
+        right_key = key_getter(on if right_on is None else right_on, self._canonical)
+        table = hash_table(self.every_existent(right_path)._elements, right_key)
+
+        def joins(record):
+            matched = table.get(left_key(record))
+            return bool(matched) and (check is None or all(check(record, right_record)
+                                                           for right_record in matched))
+
+        self.every_existent(left_path)._verify_each(
+            joins, "join with {} on {}".format(right_path, on if right_on is None
+                                               else (on, right_on)))
+
+    def verify_all(self, specs, raise_errors=True):
+        """
+        Verifies a batch of validations, each one given as a (quantifier, path, check, args) or
+        (quantifier, path, check, args, options) tuple, e.g:
+            ('every', 'albums year', 'has', [1970], {'cmp': operator.gt})
+        quantifier is the name of the selector method, a tuple with the name and the number of
+        checks (e.g: ('exactly', 2)), or None to select as in self(path). check is the name of the
+        Selector method.
+        The selections of common path prefixes are computed once for the whole batch, and the
+        validations with the same quantifier and path are verified together (see Selector.all_of).
+        Returns a list with None or the AssertionError raised by each validation. If raise_errors,
+        an AssertionError reporting all the failures is raised when any validation fails.
+        """
+        results = [None] * len(specs)
+        selections = []
+        indexes_by_selection = {}
+        for index, spec in enumerate(specs):
+            key = repr(spec[:2])
+            if key not in indexes_by_selection:
+                indexes_by_selection[key] = []
+                selections.append((spec[0], spec[1], indexes_by_selection[key]))
+            indexes_by_selection[key].append(index)
+
+        self._prefix_cache = {}
+        try:
+            for quantifier, path, indexes in selections:
+                try:
+                    selector = self._quantified(quantifier, path)
+                except AssertionError as error:
+                    for index in indexes:
+                        results[index] = error
+                    continue
+                errors = selector.all_of([specs[index][2:] for index in indexes],
+                                         raise_errors=False)
+                for index, error in zip(indexes, errors):
+                    results[index] = error
+        finally:
+            self._prefix_cache = None
+
+        failures = ["Validation {} {} failed: {}".format(index, specs[index][:3], error)
+                    for index, error in enumerate(results) if error is not None]
+        if raise_errors and failures:
+            raise AssertionError("\n".join(failures))
+        return results
+
+    def _quantified(self, quantifier, path):
+        """
+        Returns the selector built by the quantifier method named quantifier (e.g: 'every') on path.
+        Quantifiers taking a number of checks are given as a tuple, e.g: ('exactly', 2).
+        If quantifier is None, the selection is built as in self(path).
+        """
+        if quantifier is None:
+            return self(path)
+        if is_tuple(quantifier):
+            name, num_checks = quantifier
+            return getattr(self, name)(num_checks, path)
+        return getattr(self, quantifier)(path)
+
     def _build_selector(self, path,
                         min_checks=0,
                         max_checks=sys.maxint,
                         force_path_present=False,
-                        wrap=False):
-        selection = Assertable._selection(self._data, self._prefix_path + path, force_path_present)
+                        wrap=False,
+                        sampling=None):
+        full_path = self._prefix_path + path
+        selection = self._select(full_path, force_path_present)
+        sampled = None
+        if sampling and is_list(selection):
+            selection, sampled = Assertable._sample(selection, **sampling)
+        data = self._data
         selector = Selector(selection=[selection] if wrap else selection,
-                            path=self._prefix_path + path,
+                            path=full_path,
                             min_checks=Assertable._min_checks(min_checks, selection),
                             max_checks=max_checks,
-                            is_wrapped=wrap)
+                            is_wrapped=wrap,
+                            _memo=self._memo,
+                            _sampled=sampled,
+                            _canonical=self._canonical,
+                            _codegen=self._codegen,
+                            _locate=None if sampled is not None
+                            else lambda: locate(data, full_path, force_path_present))
         return selector
 
+    def _path_index(self, path):
+        if self._index is None and (any(is_descendant_lookup(node) for node in path) or
+                                    self._indexed and "**" in path):
+            self._index = PathIndex(self._data)
+        return self._index
+
+    def _select(self, path, force_path_present):
+        index = self._path_index(path)
+        if self._prefix_cache is None:
+            return Assertable._selection(self._data, path, force_path_present,
+                                         index=index, filter_index=self._filter_index)
+        try:
+            hash(tuple(path))
+        except TypeError:
+            return Assertable._selection(self._data, path, force_path_present,
+                                         index=index, filter_index=self._filter_index)
+
+        obj, start = self._data, 0
+        for end in range(len(path), 0, -1):
+            prefix = (force_path_present, tuple(path[:end]))
+            if prefix in self._prefix_cache:
+                obj, start = self._prefix_cache[prefix], end
+                break
+        for end in range(start + 1, len(path) + 1):
+            obj = Assertable._step(obj, path[end - 1], force_path_present, path,
+                                   index, self._filter_index)
+            self._prefix_cache[(force_path_present, tuple(path[:end]))] = obj
+        return obj
+
     @staticmethod
-    def _selection(obj, path, force_path_present, _root_path=None):
+    def _selection(obj, path, force_path_present, _root_path=None, index=None,
+                   filter_index=None):
         if not path:
             return obj
 
         if _root_path is None:
             _root_path = path
 
-        if is_super_list(obj):
-            return Assertable._selection(flatten(obj), path, force_path_present, _root_path)
+        next_nodes = Assertable._step(obj, path[0], force_path_present, _root_path,
+                                      index, filter_index)
+        # the lists built by the navigation (e.g: scanning lists) are new on every selection, so
+        # their filters are not worth indexing
+        if not Assertable._is_document_step(obj, path[0]):
+            filter_index = None
+        return Assertable._selection(next_nodes, path[1:], force_path_present, _root_path,
+                                     index, filter_index)
+
+    @staticmethod
+    def _is_document_step(obj, lookup_node):
+        # True if the step selects a node of the object tree itself: a key of a dict
+        return is_dict(obj) and not is_tuple(lookup_node) and lookup_node not in ("*", "**") \
+            and not is_descendant_lookup(lookup_node)
+
+    @staticmethod
+    def _step(obj, lookup_node, force_path_present, root_path, index=None, filter_index=None):
+        while is_super_list(obj):
+            obj = flatten(obj)
+
+        if is_tuple(lookup_node) and len(lookup_node) == 3:
+            (attr, op, value) = lookup_node
+            return filter_index.filter(obj, attr, op, value) if filter_index is not None \
+                else filter_nodes(obj, attr, op, value)
 
-        lookup_node, subpath = path[0], path[1:]
-        if is_tuple(lookup_node):
+        elif is_tuple(lookup_node):
             (attr, value) = lookup_node
-            filtered_nodes = [item for item in obj if item[attr] == value]
-            return Assertable._selection(filtered_nodes, subpath, force_path_present, _root_path)
+            return [item for item in obj if item[attr] == value]
 
-        else:
-            try:
-                next_nodes = Assertable._get(obj, lookup_node, force_path_present)
-                return Assertable._selection(next_nodes, subpath, force_path_present, _root_path)
-            except KeyError:
-                raise AssertionError(
-                    "Attribute {} not found in path {}".format(lookup_node, _root_path))
+        try:
+            return Assertable._get(obj, lookup_node, force_path_present, index)
+        except KeyError:
+            raise AssertionError(
+                "Attribute {} not found in path {}".format(lookup_node, root_path))
 
     @staticmethod
-    def _get(obj, lookup, force_path_present):
+    def _get(obj, lookup, force_path_present, index=None):
         if lookup == "**":
-            return expand_last_level(obj)
+            return index.leaves(obj) if index is not None else expand_last_level(obj)
+
+        elif is_descendant_lookup(lookup):
+            return index.descendants(obj, lookup[2:]) if index is not None \
+                else find_key(obj, lookup[2:])
 
         elif lookup == "*":
             return expand_one_level(obj)
@@ -210,6 +464,14 @@ class Assertable(object):
         traversable = lambda x, col: force_path_present or (is_collection(col) and x in col)
         return [item[lookup] for item in obj if traversable(lookup, item)]
 
+    @staticmethod
+    def _sample(selection, sample=None, error_rate=None, confidence=0.95, seed=None):
+        size = sample if error_rate is None else sample_size(error_rate, confidence)
+        if size is None or size >= len(selection):
+            return selection, None
+        sampled, population = reservoir_sample(selection, size, seed)
+        return sampled, population
+
     @staticmethod
     def _min_checks(user_defined_min_checks, col):
         if user_defined_min_checks is not None:
@@ -227,17 +489,26 @@ class Selector(object):
                  min_checks,
                  max_checks,
                  is_wrapped=False,
-                 _root_min_check=None,
-                 _root_max_check=None,
-                 _root_selection=None):
+                 _memo=None,
+                 _sampled=None,
+                 _canonical=to_tuples,
+                 _codegen=False,
+                 _locate=None):
         self._selection = selection
         self._min_checks = min_checks
         self._max_checks = max_checks
-        self._log_min_checks = min_checks if _root_min_check is None else _root_min_check
-        self._log_max_checks = max_checks if _root_max_check is None else _root_max_check
-        self._log_selection = selection if _root_selection is None else _root_selection
+        self._log_min_checks = min_checks
+        self._log_max_checks = max_checks
+        self._log_selection = selection
         self._log_path = path
         self._log_wrapped = is_wrapped
+        self._memo = _memo
+        self._log_sampled = _sampled
+        self._locate = _locate
+        self._canonical = _canonical
+        self._codegen = _codegen
+        # checks queued by all_of, verified together in a single pass
+        self._deferred = None
 
     @property
     def _first(self):
@@ -246,14 +517,8 @@ class Selector(object):
         else:
             return self._selection
 
-    @property
-    def _rest(self):
-        if is_list(self._selection):
-            return self._selection[1:]
-        else:
-            return []
-
-    def _capture_err_state(self, val, custom_msg=""):
+    def _capture_err_state(self, val, custom_msg="", min_checks=None):
+        min_checks = self._min_checks if min_checks is None else min_checks
         raise AssertionError(
             """
             Selection on the object under test with path {} --->
@@ -272,9 +537,64 @@ class Selector(object):
                        pprint.pformat(val),
                        "< " + str(self._log_max_checks) if self._log_min_checks == 0
                        else "= " + str(self._log_min_checks),
-                       str(self._log_min_checks - self._min_checks),
+                       str(self._log_min_checks - min_checks),
                        custom_msg))
 
+    def _failures_report(self, check, verified):
+        # locations are only computed here, so that passing verifications don't pay for them
+        if self._locate is None:
+            return ""
+        obj, loc = self._locate()
+        if not self._log_wrapped and is_juicy_list(obj):
+            located = zip(obj, item_locations(obj, loc))
+        else:
+            located = [(obj, loc)]
+        failing = []
+        for element, location in located:
+            try:
+                found = check(element)
+            except Exception:
+                # the verification may have stopped before reaching elements the check can't
+                # compare, which must not turn the assertion error into another one
+                continue
+            if found == verified:
+                failing.append(location)
+                if len(failing) == MAX_LOCATED_FAILURES:
+                    break
+        return Selector._locations_report(failing, verified)
+
+    @staticmethod
+    def _locations_report(locations, verified):
+        if not locations:
+            return ""
+        return """
+            Locations of the elements {} it (first {}) --->
+
+                    {}
+            """.format("verifying" if verified else "not verifying",
+                       MAX_LOCATED_FAILURES,
+                       "\n                    ".join(pprint.pformat(location)
+                                                    for location in locations))
+
+    def _verify_count(self, printable_obj, found, locate):
+        # the same rules as _has, for selections whose verifying elements are counted at once;
+        # locate(verifying) returns the locations of the first elements verifying it or not
+        too_many = found >= self._max_checks
+        if too_many or found < self._min_checks:
+            self._capture_err_state(printable_obj,
+                                    Selector._locations_report(locate(too_many), too_many),
+                                    min_checks=self._min_checks - found)
+
+    def _sampling_report(self, min_checks):
+        if self._log_sampled is None:
+            return ""
+        size = len(self._log_selection)
+        verified = self._log_min_checks - min_checks
+        lower, upper = wilson_interval(verified, size)
+        return ("   ->   {} elements sampled out of {}, estimated rate of elements verifying it {:.4f}"
+                " (95% confidence interval [{:.4f}, {:.4f}])").format(
+            size, self._log_sampled, float(verified) / size, lower, upper)
+
     def has(self, *content, **options):
         """
         Compares content against the selection elements using the selector rules.
@@ -313,13 +633,82 @@ class Selector(object):
         """
         self.has(*content, cmp=list.__contains__, property=lambda x: x.keys())
 
-    def has_no_duplicates(self):
+    def has_no_duplicates(self, approximate=False, false_positive_rate=0.01):
         """
         Asserts that there are no duplicates in the selection.
+        If approximate, duplicate candidates are flagged by a fixed size Bloom filter with the
+        given false positive rate and only they are counted exactly, instead of keeping every
+        element in memory. The result is the same.
         """
-        if self._min_checks > len(unique(self._selection)):
+        self._whole_selection("has_no_duplicates")
+        if approximate and is_list(self._selection):
+            repeated = duplicates(self._selection, false_positive_rate)
+            distinct = len(self._selection) - sum(count - 1 for count in repeated.values())
+        else:
+            distinct = len(unique(self._selection, self._canonical))
+        if self._min_checks > distinct:
             self._capture_err_state("[Itself]", "   ->   Duplicates found.")
 
+    def approx_distinct_count(self, expected, error_rate=0.01, **options):
+        """
+        Asserts the number of distinct elements in the selection, estimated by a fixed size
+        HyperLogLog sketch with the given relative standard error. By default the estimate must
+        be within three standard errors of expected.
+
+        Options:
+            cmp: comparator function applied to the estimate and expected; e.g: operator.ge
+            property: function applied to every element before counting it; e.g: len
+        """
+        within_error = lambda estimate, count: abs(estimate - count) <= 3 * error_rate * count
+        options = dict(options, cmp=options.get("cmp", within_error))
+
+        def estimate(values):
+            sketch = HyperLogLog(error_rate)
+            for value in values:
+                sketch.add(value)
+            return sketch.count()
+
+        self._aggregate("estimated distinct count", estimate, expected, options)
+
+    def is_unique_by(self, *keys):
+        """
+        Asserts that no two records in the selection have the same values of keys, e.g:
+        is_unique_by('tenant', 'email'). Records lacking any of the keys are not compared.
+        The records are grouped by key in a single pass; the repeated keys are reported.
+        """
+        self._whole_selection("is_unique_by")
+        counts = group_counts(self._elements, key_getter(list(keys), self._canonical))
+        repeated = sorted((key, count) for key, count in counts.items() if count > 1)
+        if repeated:
+            self._capture_err_state(list(keys), self._groups_report("repeated", repeated))
+
+    def group_sizes_are(self, keys, expected, **options):
+        """
+        Groups the records in the selection by the values of keys (a key, or a list of keys) and
+        asserts the number of records in every group, e.g: group_sizes_are('group_id', 3).
+        Records lacking any of the keys are not grouped.
+
+        Options:
+            cmp: comparator function applied to every group size and expected; e.g: operator.le
+        """
+        self._whole_selection("group_sizes_are")
+        compare = options.get("cmp", operator.eq)
+        counts = group_counts(self._elements, key_getter(keys, self._canonical))
+        wrong = sorted((key, count) for key, count in counts.items()
+                       if not compare(count, expected))
+        if wrong:
+            self._capture_err_state(expected, self._groups_report("with a wrong size", wrong))
+
+    @staticmethod
+    def _groups_report(kind, groups):
+        return """   ->   {} keys {} (first {}, key: size) --->
+
+                    {}
+            """.format(len(groups), kind, MAX_LOCATED_FAILURES,
+                       "\n                    ".join("{}: {}".format(pprint.pformat(key), count)
+                                                    for key, count in
+                                                    groups[:MAX_LOCATED_FAILURES]))
+
     def has_no_nones(self):
         """
         Asserts that there are no nones in the selection.
@@ -359,6 +748,237 @@ class Selector(object):
         """
         self.has([sorted(keys)], cmp=operator.eq, property=lambda x: sorted(x.keys()), raw_obj=keys)
 
+    def contains_snapshot(self, snapshot, key=None):
+        """
+        Asserts that elements in selection structurally contain snapshot: dicts may have extra keys
+        and lists extra items. List items are aligned by the value of key when given, otherwise by
+        equality, so big documents are compared in near linear time. Items that are neither
+        aligned by key nor equal to an actual item are compared with every remaining actual item,
+        in O(n*m) time for n such items and m actual ones: give key to align big lists of dicts.
+        On failure the differences with the first element not containing snapshot are reported.
+        """
+        # the differences with the first element found not containing snapshot
+        failed = []
+
+        def contains(element, expected):
+            differences = diff(expected.value, element, key)
+            if differences and not failed:
+                failed.append(differences)
+            return not differences
+
+        try:
+            self._has(_Snapshot(snapshot), cmp_fn=contains, raw_obj=snapshot)
+        except AssertionError as error:
+            # results remembered by an IncrementalAssertable don't call contains again
+            differences = failed[0] if failed else next(
+                (found for found in (diff(snapshot, element, key) for element in self._elements)
+                 if found), [])
+            raise AssertionError("""{}
+            Differences (path, expected, got) --->
+
+                    {}
+            """.format(error, pprint.pformat(differences)))
+
+    def sum_is(self, expected, **options):
+        """
+        Asserts the sum of the elements in the selection.
+
+        Options:
+            cmp: comparator function applied to the sum and expected; e.g: operator.le
+            property: function applied to every element before aggregating it; e.g: len
+        """
+        self._aggregate("sum", sum, expected, options)
+
+    def min_is(self, expected, **options):
+        """
+        Asserts the minimum of the elements in the selection. Options as in sum_is.
+        """
+        self._aggregate("min", min, expected, options, needs_elements=True)
+
+    def max_is(self, expected, **options):
+        """
+        Asserts the maximum of the elements in the selection. Options as in sum_is.
+        """
+        self._aggregate("max", max, expected, options, needs_elements=True)
+
+    def mean_between(self, lower, upper, **options):
+        """
+        Asserts that the mean of the elements in the selection is in [lower, upper].
+        Options as in sum_is, except cmp.
+        """
+        options = dict(options, cmp=lambda mean, bounds: bounds[0] <= mean <= bounds[1])
+        self._aggregate("mean", mean, (lower, upper), options, needs_elements=True)
+
+    def count_where(self, predicate, expected, **options):
+        """
+        Asserts the number of elements in the selection for which predicate is True.
+        Options as in sum_is.
+        """
+        count = lambda values: sum(1 for value in values if predicate(value))
+        self._aggregate("count", count, expected, options)
+
+    def distinct_count(self, expected, **options):
+        """
+        Asserts the number of distinct elements in the selection. Options as in sum_is.
+        """
+        distinct = lambda values: len(set(self._canonical(value) for value in values))
+        self._aggregate("distinct count", distinct, expected, options)
+
+    @property
+    def _elements(self):
+        selection = self._selection[0] if self._log_wrapped and self._selection \
+            else self._selection
+        return selection if is_list(selection) else [selection]
+
+    def _whole_selection(self, check):
+        # checks on the whole selection would only verify the sampled elements
+        if self._log_sampled is not None:
+            raise ValueError("{} can't be verified on a sampled selection ({} elements sampled "
+                             "out of {})".format(check, len(self._selection), self._log_sampled))
+
+    def _aggregate(self, name, aggregate_fn, expected, options, needs_elements=False):
+        """
+        Asserts aggregate_fn of the elements in the selection (or of their property) against
+        expected. If needs_elements, an empty selection fails, e.g: for min.
+        """
+        self._whole_selection(name)
+        property_fn = options.get("property", _identity)
+        elements = self._elements
+        if needs_elements and not elements:
+            self._capture_err_state(expected, "   ->   {} of an empty selection".format(name))
+        # builtin aggregates run over lists at C speed, and over generators in constant memory
+        values = elements if property_fn is _identity else (property_fn(x) for x in elements)
+        actual = aggregate_fn(values)
+        if not options.get("cmp", operator.eq)(actual, expected):
+            self._capture_err_state(expected, "   ->   {} = {}".format(name, actual))
+
+    def all_of(self, checks, raise_errors=True):
+        """
+        Verifies several checks on the selection, each one given as a (check, args) or
+        (check, args, options) tuple, e.g:
+            all_of([('is_not_none', []), ('matches', ['^[0-9]+$']), ('has_length', [3])])
+        check is the name of the Selector method. The checks comparing the elements one by one
+        (has, is_, matches, has_length...) are verified together in a single pass over the
+        selection, looking up and canonicalizing the values of every element once for all of
+        them. Any other check (e.g: has_no_duplicates) runs on its own.
+        Returns a list with None or the AssertionError raised by each check. If raise_errors, an
+        AssertionError reporting all the failures is raised when any check fails.
+        """
+        results = [None] * len(checks)
+        queued = []
+        for index, spec in enumerate(checks):
+            check, args = spec[:2]
+            options = spec[2] if len(spec) > 2 else {}
+            # contains_snapshot extends the errors of its comparisons, so they are not queued
+            self._deferred = [] if check != 'contains_snapshot' else None
+            try:
+                getattr(self, check)(*args, **options)
+            except AssertionError as error:
+                results[index] = error
+            finally:
+                queued.extend((index, comparison) for comparison in self._deferred or [])
+                self._deferred = None
+
+        errors = self._has_all([comparison for _, comparison in queued])
+        for (index, _), error in zip(queued, errors):
+            if results[index] is None:
+                results[index] = error
+
+        failures = ["Check {} {} failed: {}".format(index, checks[index][0], error)
+                    for index, error in enumerate(results) if error is not None]
+        if raise_errors and failures:
+            raise AssertionError("\n".join(failures))
+        return results
+
+    def _has_all(self, comparisons):
+        """
+        Verifies comparisons, given as _has arguments, with the same rules as _has in a single
+        pass over the selection. Returns a list with None or the AssertionError of each one.
+        """
+        selection = self._selection
+        if not is_juicy_list(selection) or len(comparisons) < 2:
+            return [Selector._error(self._has, *comparison) for comparison in comparisons]
+
+        checks, printable_objs, shared = [], [], []
+        for input_arg, cmp_fn, property_fn, or_, raw_obj in comparisons:
+            printable_objs.append(input_arg if raw_obj is None else raw_obj)
+            checks.append(self._checker(input_arg, cmp_fn, property_fn, or_, printable_objs[-1]))
+            # values worth sharing: transformed by a property or looked up by key
+            if property_fn is not _identity or is_dict(input_arg):
+                shared.append(property_fn)
+        share = len(set(shared)) < len(shared)
+
+        # min_checks and max_checks left for every comparison, updated as in _has, and the
+        # verified value (1 or 0) of the elements to report for the failing ones
+        min_checks = [self._min_checks] * len(checks)
+        max_checks = [self._max_checks] * len(checks)
+        failing = [None] * len(checks)
+        undecided = range(len(checks))
+        length = len(selection)
+        for position, element in enumerate(selection):
+            comparable = Selector._comparables(element) if share else None
+            remaining = length - position
+            evaluated = []
+            for index in undecided:
+                if max_checks[index] == 0:
+                    failing[index] = 1
+                elif min_checks[index] > 0 or max_checks[index] <= remaining:
+                    found = checks[index](element, comparable=comparable)
+                    min_checks[index] -= found
+                    max_checks[index] -= found
+                    evaluated.append(index)
+            undecided = evaluated
+            if not undecided:
+                break
+        for index in undecided:
+            failing[index] = 1 if max_checks[index] == 0 else 0 if min_checks[index] > 0 else None
+
+        errors = []
+        for check, printable_obj, left, verified in zip(checks, printable_objs, min_checks,
+                                                        failing):
+            if verified is None:
+                errors.append(None)
+                continue
+            report = self._failures_report(check, verified)
+            if verified == 0:
+                report = self._sampling_report(left) + report
+            errors.append(Selector._error(self._capture_err_state, printable_obj, report,
+                                          min_checks=left))
+        return errors
+
+    @staticmethod
+    def _comparables(element):
+        # the values of element looked up (and transformed by property_fn) by the checks
+        values = {}
+
+        def comparable(keys, property_fn):
+            key = (keys, property_fn)
+            if key not in values:
+                values[key] = property_fn(multi_get(element, keys))
+            return values[key]
+        return comparable
+
+    @staticmethod
+    def _error(verification, *args, **kwargs):
+        try:
+            verification(*args, **kwargs)
+        except AssertionError as error:
+            return error
+
+    def _verify_each(self, check, description):
+        failing = [element for element in self._elements if not check(element)]
+        if failing:
+            self._capture_err_state(
+                description,
+                """   ->   {} elements not verifying it (first {}) --->
+
+                    {}
+            """.format(len(failing), MAX_LOCATED_FAILURES,
+                       "\n                    ".join(pprint.pformat(element) for element
+                                                    in failing[:MAX_LOCATED_FAILURES])) +
+                self._failures_report(check, False),
+                min_checks=len(failing))
+
     def is_ordered(self, *content):
         for item in content:
             self._has(tuple(item), cmp_fn=operator.eq, property_fn=lambda x: tuple(x), raw_obj=item)
@@ -421,49 +1041,108 @@ class Selector(object):
 
     def _is(self, input_arg, cmp_fn):
         if is_collection(input_arg):
-            self._has(unique(input_arg), cmp_fn=cmp_fn, property_fn=lambda col: unique(col),
+            self._has(unique(input_arg), cmp_fn=cmp_fn,
+                      property_fn=self._unique,
                       raw_obj=input_arg)
         else:
             self._has(input_arg, cmp_fn=cmp_fn, raw_obj=input_arg)
 
+    def _unique(self, col):
+        # a method rather than a lambda, so all_of shares its results between checks
+        return unique(col, self._canonical)
+
     def _has(self, input_arg, cmp_fn=None, property_fn=_identity, or_=False, raw_obj=None):
+        # the selection is consumed by position, without copying it: position 0 stands for the
+        # whole selection, which is checked as a single element when it is not a non-empty list
+        if self._deferred is not None:
+            self._deferred.append((input_arg, cmp_fn, property_fn, or_, raw_obj))
+            return
         printable_obj = input_arg if raw_obj is None else raw_obj
-        if self._max_checks == 0:
-            # raises assertion error
-            self._capture_err_state(printable_obj)
-
-        if not self._selection and self._selection is not self._log_selection:
-            # second condition ensure that it is "consuming" the selection and not testing against
-            # any logical false expression (eg: [], None, 0...), in which case it should proceed
-            # with verification
-            if self._min_checks > 0:
+        generated = self._generated(input_arg, cmp_fn, property_fn, or_)
+        check = generated[0] if generated is not None \
+            else self._checker(input_arg, cmp_fn, property_fn, or_, printable_obj)
+        selection = self._selection
+        if generated is not None and is_juicy_list(selection):
+            failing, min_checks = generated[1](selection, self._min_checks, self._max_checks)
+            if failing is not None:
                 # raises assertion error
-                self._capture_err_state(printable_obj)
+                self._capture_err_state(printable_obj,
+                                        (self._sampling_report(min_checks) if failing == 0
+                                         else "") + self._failures_report(check, failing),
+                                        min_checks=min_checks)
             return
-
-        if self._min_checks == 0 and is_collection(self._selection) and self._max_checks > len(
-                self._selection):
-            return
-
-        found = Selector._check(self._first, input_arg, cmp_fn, property_fn, or_)
-
-        return Selector(selection=self._rest,
-                        path=self._log_path,
-                        min_checks=self._min_checks - found,
-                        max_checks=self._max_checks - found,
-                        is_wrapped=self._log_wrapped,
-                        _root_min_check=self._log_min_checks,
-                        _root_max_check=self._log_max_checks,
-                        _root_selection=self._log_selection)._has(input_arg,
-                                                                  cmp_fn=cmp_fn,
-                                                                  property_fn=property_fn,
-                                                                  or_=or_,
-                                                                  raw_obj=raw_obj)
+        min_checks, max_checks = self._min_checks, self._max_checks
+        length = len(selection) if is_list(selection) else None
+        position = 0
+        while True:
+            if max_checks == 0:
+                # raises assertion error
+                self._capture_err_state(printable_obj, self._failures_report(check, 1),
+                                        min_checks=min_checks)
+
+            if position > 0 and (length is None or position >= length):
+                # the selection has been consumed; note that at position 0 any logical false
+                # selection (eg: [], None, 0...) must proceed with verification
+                if min_checks > 0:
+                    # raises assertion error
+                    self._capture_err_state(printable_obj,
+                                            self._sampling_report(min_checks) +
+                                            self._failures_report(check, 0),
+                                            min_checks=min_checks)
+                return
+
+            remaining = length - position if position > 0 else \
+                len(selection) if is_collection(selection) else None
+            if min_checks == 0 and remaining is not None and max_checks > remaining:
+                return
+
+            found = check(selection[position] if length else selection)
+            min_checks -= found
+            max_checks -= found
+            position += 1
+
+    def _generated(self, input_arg, cmp_fn, property_fn, or_):
+        # the (check, count) functions generated for the comparison, if enabled and possible
+        if not self._codegen or self._memo is not None:
+            return None
+        return evaluator(input_arg, cmp_fn, None if property_fn is _identity else property_fn,
+                         or_, Selector._default_comparator)
+
+    def _checker(self, input_arg, cmp_fn, property_fn, or_, printable_obj):
+        # returns check(element, comparable=None), see _check
+        generated = self._generated(input_arg, cmp_fn, property_fn, or_)
+        if generated is not None:
+            return generated[0]
+        if self._memo is not None or is_list(input_arg) or is_dict(input_arg):
+            # results are remembered per comparison, as comparisons of the same verification
+            # may share their input but not their comparator, property or or_
+            memo_key = (self._memo.comparison(), printable_obj) if self._memo is not None \
+                else None
+            return lambda element, comparable=None: self._memoized_check(
+                element, input_arg, cmp_fn, property_fn, or_, memo_key, comparable)
+        # the element (transformed by property_fn) is compared with input_arg as a whole, as
+        # _check does, without building the comparison closures for every element
+        value = lambda element, comparable: property_fn(element) if comparable is None \
+            else comparable((), property_fn)
+        if cmp_fn is None:
+            return lambda element, comparable=None: 1 if Selector._default_comparator(element)(
+                value(element, comparable), input_arg) else 0
+        return lambda element, comparable=None: 1 if cmp_fn(value(element, comparable),
+                                                             input_arg) else 0
+
+    def _memoized_check(self, element, input_arg, cmp_fn, property_fn, or_, memo_key,
+                        comparable=None):
+        check = lambda: Selector._check(element, input_arg, cmp_fn, property_fn, or_, comparable)
+        if self._memo is None:
+            return check()
+        return self._memo.lookup(memo_key, element, check)
 
     @staticmethod
-    def _check(current_selection_element, input_arg, cmp_fn, property_fn, or_):
+    def _check(current_selection_element, input_arg, cmp_fn, property_fn, or_, comparable=None):
+        # comparable(keys, property_fn) may return the values already computed by other checks
         current_selection_comparable = lambda *keys: property_fn(
-            multi_get(current_selection_element, keys))
+            multi_get(current_selection_element, keys)) if comparable is None \
+            else comparable(keys, property_fn)
         comparator = cmp_fn or Selector._default_comparator(current_selection_element)
         return Selector._check_element(input_arg, comparator, current_selection_comparable, or_)
 
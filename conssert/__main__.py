@@ -0,0 +1,72 @@
+"""
+Validates data files against a spec (see conssert.specs.load), streaming one JSON line per file:
+
+    python -m conssert spec.json 'exports/*.json' --workers 8
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import sys
+
+from conssert import specs
+
+
+def main(argv=None, out=None, err=None):
+    out = out or sys.stdout
+    err = err or sys.stderr
+    parser = argparse.ArgumentParser(prog="conssert",
+                                     description="Validates data files against a spec.")
+    parser.add_argument("spec", help="JSON or YAML spec file, Python file or Python module")
+    parser.add_argument("data", nargs="+", help="JSON or YAML data files or glob patterns")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes (default: number of cores)")
+    args = parser.parse_args(argv)
+
+    paths = sorted(set(path for pattern in args.data for path in glob.glob(pattern) or [pattern]))
+    tasks = [(args.spec, path) for path in paths]
+    if args.workers > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(min(args.workers, len(tasks)))
+        results = pool.imap_unordered(_validate, tasks)
+    else:
+        pool = None
+        results = (_validate(task) for task in tasks)
+
+    failed = 0
+    try:
+        for result in results:
+            failed += not result["passed"]
+            out.write(json.dumps(result, default=repr) + "\n")
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    err.write("{} files, {} passed, {} failed\n".format(len(tasks), len(tasks) - failed, failed))
+    return 1 if failed else 0
+
+
+def _validate(task):
+    spec, path = task
+    try:
+        plan = specs.load(spec)
+        results = plan.verify(specs.read(path), raise_errors=False)
+    except Exception as error:
+        # any error (e.g: unreadable file, invalid spec, data of an unexpected shape) fails the
+        # file alone, so that the rest of the files are still validated
+        return {"file": path, "passed": False,
+                "error": "{}: {}".format(type(error).__name__, error)}
+
+    failures = [{"validation": index,
+                 "spec": plan.validations[index][:3],
+                 "error": str(error)}
+                for index, error in enumerate(results) if error is not None]
+    return {"file": path,
+            "passed": not failures,
+            "validations": len(results),
+            "failures": failures}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
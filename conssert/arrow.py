@@ -0,0 +1,107 @@
+"""
+This module provides an Assertable over Apache Arrow tables and Parquet files (pyarrow and pandas
+are only required to use it), reading only the data the validations need.
+Paths are resolved as in conssert.frames. Column selections only read the columns in the path
+and in its filters, and from Parquet files only the row groups whose statistics show they may
+hold rows verifying the filters. Any other path reads the whole table once.
+"""
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+from conssert.frames import FrameAssertable, pandas
+from conssert.index import _comparable_kind
+from conssert.navigate import *
+
+
+class ArrowAssertable(FrameAssertable):
+    """
+    Assertable over an Arrow Table or a Parquet file, standing for the list of its rows.
+    """
+
+    def __init__(self, source, prefix_path=[]):
+        """
+        Args:
+            source (pyarrow.Table, pyarrow.parquet.ParquetFile): object under test.
+            prefix_path (str, list): path of the object tree under test.
+        """
+        if pyarrow is None or pandas is None:
+            raise ImportError("pyarrow and pandas are required to validate Arrow and Parquet data")
+        super(ArrowAssertable, self).__init__(None, prefix_path)
+        self._source = source
+        self._projections = {}
+
+    def _table(self):
+        return self._source.read().to_pandas() if self._is_parquet() else self._source.to_pandas()
+
+    def _column_names(self):
+        return self._source.schema.to_arrow_schema().names if self._is_parquet() \
+            else self._source.schema.names
+
+    def _project(self, names, filters):
+        names = tuple(sorted(set(names)))
+        row_groups = self._row_groups(filters)
+        key = (names, row_groups)
+        if key not in self._projections:
+            self._projections[key] = self._read(names, row_groups)
+        return self._projections[key]
+
+    def _is_parquet(self):
+        return isinstance(self._source, parquet.ParquetFile)
+
+    def _read(self, names, row_groups):
+        if not self._is_parquet():
+            return pandas.DataFrame(dict((name, self._source.column(name).to_pandas())
+                                         for name in names), columns=names)
+        elif row_groups is None:
+            return self._source.read(columns=list(names)).to_pandas()
+        elif not row_groups:
+            return pandas.DataFrame(columns=names)
+
+        frame = self._source.read_row_groups(list(row_groups), columns=list(names)).to_pandas()
+        # rows keep their position in the file, so failures are located in it
+        metadata = self._source.metadata
+        starts = [0]
+        for group in range(metadata.num_row_groups):
+            starts.append(starts[-1] + metadata.row_group(group).num_rows)
+        frame.index = [row for group in row_groups
+                       for row in xrange(starts[group], starts[group + 1])]
+        return frame
+
+    def _row_groups(self, filters):
+        """
+        Returns the row groups of the Parquet file that may hold rows verifying the filters, or
+        None if all of them must be read.
+        """
+        if not filters or not self._is_parquet():
+            return None
+        metadata = self._source.metadata
+        return tuple(group for group in range(metadata.num_row_groups)
+                     if all(_may_verify(metadata.row_group(group), node) for node in filters))
+
+
+def _may_verify(row_group, node):
+    attr, op, value = node if len(node) == 3 else (node[0], '==', node[1])
+    values = list(value) if op == 'in' and is_collection(value) else [value]
+    if op not in ('==', 'in', '<', '<=', '>', '>='):
+        return True
+
+    for position in range(row_group.num_columns):
+        column = row_group.column(position)
+        if column.path_in_schema == attr:
+            statistics = column.statistics
+            break
+    else:
+        return True
+    if statistics is None or not statistics.has_min_max:
+        return True
+
+    low, high = statistics.min, statistics.max
+    if _comparable_kind(values + [low, high]) is None:
+        return True
+    elif op in ('==', 'in'):
+        return any(low <= item <= high for item in values)
+    return {'<': low < value, '<=': low <= value, '>': high > value, '>=': high >= value}[op]
@@ -0,0 +1,169 @@
+"""
+This module generates Python functions verifying the comparisons of Selector (see the codegen
+option of Assertable), instead of going through the generic _check, _check_element, _check_dict
+and _cmp layers for every element.
+A comparison plan is made of the shape of the assertion input (a value, a list of values, or a
+dict with its keys and nested dicts), whether the comparator depends on every element, whether
+any comparison verifying is enough, and whether a property is applied. Every plan is compiled
+once into a loop counting the verifying elements of a selection with the rules of Selector._has,
+with the lookups and comparisons of the input unrolled into a single expression; the values of
+the input are bound to the generated functions, so plans are shared by inputs with the same shape.
+"""
+
+from conssert.navigate import *
+
+
+# generated factories by plan
+_factories = {}
+
+_KEY_TYPES = (basestring, int, long, bool, type(None))
+
+_TEMPLATE = '''
+def factory(_cmp, _property, _default_comparator, _walk, {constants}):
+
+    def check(element, comparable=None, _isinstance=isinstance, _dict=dict, {bound}):
+        {comparator}
+        return 1 if {expression} else 0
+
+    def count(selection, min_checks, max_checks, _isinstance=isinstance, _dict=dict, {bound}):
+        length = len(selection)
+        position = 0
+        for element in selection:
+            if max_checks == 0:
+                return 1, min_checks
+            if min_checks == 0 and max_checks > length - position:
+                return None, min_checks
+            {comparator}
+            if {expression}:
+                min_checks -= 1
+                max_checks -= 1
+            position += 1
+        if max_checks == 0:
+            return 1, min_checks
+        return (0 if min_checks > 0 else None), min_checks
+
+    return check, count
+'''
+
+
+def evaluator(input_arg, cmp_fn, property_fn, or_, default_comparator):
+    """
+    Returns the (check, count) functions generated to compare input_arg with selection elements
+    as Selector._check does, or None if the shape of input_arg can't be compiled.
+    check(element) returns 1 if element verifies the comparison, or 0 otherwise.
+    count(selection, min_checks, max_checks) consumes a non-empty list as Selector._has does and
+    returns the verified value (1 or 0) of the elements to report, or None if the comparison
+    holds, and the min_checks left.
+    cmp_fn is the comparator, or None to use default_comparator(element); property_fn is
+    applied to the compared values, or None for none.
+    """
+    constants = []
+    shape = _shape(input_arg, constants)
+    if shape is None:
+        return None
+    plan = (shape, cmp_fn is None, bool(or_), property_fn is None)
+    factory = _factories.get(plan)
+    if factory is None:
+        factory = _factories[plan] = _compile(plan, len(constants))
+    return factory(cmp_fn, property_fn, default_comparator, _walk, *constants)
+
+
+def source(input_arg, cmp_fn=None, property_fn=None, or_=False):
+    """
+    Returns the source code generated for the comparison plan of input_arg, or None if it
+    can't be compiled; e.g: to inspect the code run by the codegen option.
+    """
+    constants = []
+    shape = _shape(input_arg, constants)
+    if shape is None:
+        return None
+    return _source((shape, cmp_fn is None, bool(or_), property_fn is None), len(constants))
+
+
+def _shape(input_arg, constants):
+    """
+    Returns the shape of input_arg, appending its values to constants in the order of the
+    comparisons, or None if any of its keys can't be written in the generated code.
+    """
+    if is_list(input_arg):
+        constants.extend(input_arg)
+        return 'list', len(input_arg)
+    elif is_dict(input_arg):
+        return _dict_shape(input_arg, constants)
+    constants.append(input_arg)
+    return 'value',
+
+
+def _dict_shape(input_arg, constants):
+    # as in Selector._check_dict: the values that are not dicts are compared first, in the order
+    # of the input, and then the nested dicts
+    if not all(isinstance(key, _KEY_TYPES) for key in input_arg):
+        return None
+    flat = []
+    for key, value in input_arg.items():
+        if not is_dict(value):
+            flat.append(key)
+            constants.append(value)
+    nested = []
+    for key, value in input_arg.items():
+        if is_dict(value):
+            shape = _dict_shape(value, constants)
+            if shape is None:
+                return None
+            nested.append((key, shape))
+    return 'dict', tuple(flat), tuple(nested)
+
+
+def _compile(plan, num_constants):
+    namespace = {}
+    exec compile(_source(plan, num_constants), '<conssert plan {}>'.format(plan), 'exec') \
+        in namespace
+    return namespace['factory']
+
+
+def _source(plan, num_constants):
+    shape, default_comparator, or_, no_property = plan
+    names = ['_c{}'.format(index) for index in range(num_constants)]
+    counter = iter(names)
+    property_fn = (lambda value: value) if no_property \
+        else (lambda value: '_property({})'.format(value))
+    return _TEMPLATE.format(
+        constants=', '.join(names),
+        bound=', '.join(['{0}={0}'.format(name) for name in names] +
+                        ['_compare=_cmp', '_property=_property']),
+        # the default comparator depends on every element
+        comparator='_compare = _default_comparator(element)' if default_comparator else 'pass',
+        expression=_expression(shape, (), counter, property_fn, or_))
+
+
+def _expression(shape, keys, counter, property_fn, or_):
+    joiner, empty = (' or ', 'False') if or_ else (' and ', 'True')
+    if shape[0] == 'value':
+        return '_compare({}, {})'.format(property_fn(_lookup(keys)), next(counter))
+    elif shape[0] == 'list':
+        value = property_fn(_lookup(keys))
+        terms = ['_compare({}, {})'.format(value, next(counter)) for _ in range(shape[1])]
+    else:
+        _, flat, nested = shape
+        terms = ['_compare({}, {})'.format(property_fn(_lookup(keys + (key,))), next(counter))
+                 for key in flat]
+        terms.extend(_expression(nested_shape, keys + (key,), counter, property_fn, or_)
+                     for key, nested_shape in nested)
+    return '(' + (joiner.join(terms) or empty) + ')'
+
+
+def _lookup(keys):
+    # the same values as multi_get: the lookups stop at the first value that is not a dict
+    if not keys:
+        return 'element'
+    elif len(keys) == 1:
+        return '(element.get({0!r}) if _isinstance(element, _dict) else element)'.format(keys[0])
+    return '_walk(element, {!r})'.format(keys)
+
+
+def _walk(element, keys):
+    for key in keys:
+        if not isinstance(element, dict):
+            return element
+        element = element.get(key)
+    return element
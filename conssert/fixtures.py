@@ -0,0 +1,101 @@
+"""
+This module provides a registry of normalized fixtures, so that Assertables built over the same
+object under test (in the same test process or in later ones) do not normalize it again.
+"""
+
+import hashlib
+import os
+import tempfile
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from conssert import Assertable
+from conssert.navigate import to_dict
+
+
+class FixtureRegistry(object):
+    """
+    Caches the result of to_dict by a user supplied key or by the digest of the pickled object.
+    Cached trees are shared between Assertables, so they must not be modified.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir (str): optional directory where normalized trees are pickled so later
+            test processes can load them instead of normalizing again.
+        """
+        self._cache_dir = cache_dir
+        self._normalized = {}
+
+    def assertable(self, data, prefix_path=[], key=None):
+        """
+        Returns an Assertable over the normalized data (see normalize).
+        """
+        return Assertable(self.normalize(data, key), prefix_path, normalize=False)
+
+    def normalize(self, data, key=None):
+        """
+        Returns to_dict(data), cached by key, which must identify the content of data.
+        If key is None the digest of the pickled data is used instead, and the result is not
+        cached when data can't be pickled.
+        """
+        cache_key = digest(data) if key is None else 'key-' + hashlib.sha1(repr(key)).hexdigest()
+        if cache_key is None:
+            return to_dict(data)
+
+        if cache_key not in self._normalized:
+            normalized = self._load(cache_key)
+            if normalized is None:
+                normalized = to_dict(data)
+                self._dump(cache_key, normalized)
+            self._normalized[cache_key] = normalized
+        return self._normalized[cache_key]
+
+    def clear(self):
+        """
+        Forgets the normalized trees kept in memory; the ones on disk are kept.
+        """
+        self._normalized.clear()
+
+    def _file(self, cache_key):
+        return os.path.join(self._cache_dir, cache_key + '.pickle')
+
+    def _load(self, cache_key):
+        if self._cache_dir is None or not os.path.exists(self._file(cache_key)):
+            return None
+        try:
+            with open(self._file(cache_key), 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (EOFError, pickle.UnpicklingError):
+            return None
+
+    def _dump(self, cache_key, normalized):
+        if self._cache_dir is None:
+            return
+        if not os.path.isdir(self._cache_dir):
+            os.makedirs(self._cache_dir)
+        # written aside and renamed, so concurrent test processes never read a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as cache_file:
+                pickle.dump(normalized, cache_file, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_path, self._file(cache_key))
+        except (pickle.PicklingError, TypeError):
+            os.remove(tmp_path)
+
+
+def digest(data):
+    """
+    Returns the hex digest of the pickled data, or None if it can't be pickled.
+    """
+    try:
+        return hashlib.sha1(pickle.dumps(data, pickle.HIGHEST_PROTOCOL)).hexdigest()
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+
+fixtures = FixtureRegistry(os.environ.get('CONSSERT_FIXTURE_CACHE'))
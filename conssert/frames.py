@@ -0,0 +1,235 @@
+"""
+This module provides an Assertable over pandas DataFrames and Series (pandas is only required to
+use it), verifying the validations on a column with vectorized operations instead of converting
+the frame to a list of dicts.
+A frame stands for the list of its rows as dicts: the first name in a path selects a column, and
+(key, value) and (key, operator, value) filters before it select rows with boolean masks. is_,
+is_not, matches and has_length on such selections run on the whole column at once, while any
+other path or validation runs on the rows converted by to_dict, built only when first needed.
+"""
+
+import operator
+import sys
+
+try:
+    import numpy
+    import pandas
+except ImportError:
+    pandas = None
+
+from conssert import Assertable, Selector, MAX_LOCATED_FAILURES
+from conssert.navigate import *
+
+
+_MASK_OPERATORS = {'==': operator.eq,
+                   '!=': operator.ne,
+                   '<': operator.lt,
+                   '<=': operator.le,
+                   '>': operator.gt,
+                   '>=': operator.ge}
+
+
+def _native(value):
+    # the values of frames (e.g: read from Arrow columns) may be numpy arrays and scalars, which
+    # are only converted here so that to_dict keeps them anywhere else
+    if isinstance(value, numpy.ndarray):
+        return _native(value.tolist())
+    elif isinstance(value, numpy.generic):
+        return value.item()
+    elif type(value) is dict:
+        return dict((key, _native(item)) for key, item in value.items())
+    elif type(value) is list:
+        return [_native(item) for item in value]
+    return value
+
+
+if pandas is not None:
+    register_adapter(pandas.DataFrame, lambda frame: _native(frame.to_dict('records')))
+    register_adapter(pandas.Series, lambda series: _native(series.tolist()))
+
+
+class FrameAssertable(Assertable):
+    """
+    Assertable over a pandas DataFrame, or a Series standing for the list of its values.
+    """
+
+    def __init__(self, frame, prefix_path=[]):
+        """
+        Args:
+            frame (DataFrame, Series): object under test; it must not be modified while in use.
+            prefix_path (str, list): path of the object tree under test.
+        """
+        if pandas is None:
+            raise ImportError("pandas is required to validate DataFrames")
+        super(FrameAssertable, self).__init__(None, prefix_path, normalize=False)
+        self._frame = frame
+
+    @property
+    def _data(self):
+        # the rows are only converted for the paths and validations that can't use the columns
+        if self._rows is None:
+            self._rows = to_dict(self._table())
+        return self._rows
+
+    @_data.setter
+    def _data(self, rows):
+        self._rows = rows
+
+    def _build_selector(self, path,
+                        min_checks=0,
+                        max_checks=sys.maxint,
+                        force_path_present=False,
+                        wrap=False,
+                        sampling=None):
+        full_path = self._prefix_path + path
+        column = None if wrap or sampling else self._column(full_path, force_path_present)
+        if column is None:
+            return super(FrameAssertable, self)._build_selector(path, min_checks, max_checks,
+                                                                force_path_present, wrap, sampling)
+        return FrameSelector(column,
+                             path=full_path,
+                             min_checks=len(column) if min_checks is None else min_checks,
+                             max_checks=max_checks)
+
+    def _column(self, path, force_path_present):
+        """
+        Returns the Series selected by path, or None if path is not a column selection.
+        """
+        if isinstance(self._frame, pandas.Series):
+            if path:
+                return None
+            column = self._frame
+        else:
+            filters = [node for node in path if is_tuple(node)]
+            names = path[len(filters):]
+            columns = self._column_names()
+            if len(names) != 1 or any(is_tuple(node) for node in names) or \
+                    names[0] not in columns or any(node[0] not in columns for node in filters):
+                return None
+            frame = self._project([names[0]] + [node[0] for node in filters], filters)
+            mask = FrameAssertable._mask(frame, filters)
+            if mask is None:
+                return None
+            column = frame[names[0]] if mask is True else frame[names[0]][mask]
+
+        # every row has all the columns, so null cells are selected as the rows do
+        return column
+
+    def _table(self):
+        """
+        Returns the DataFrame or Series under test.
+        """
+        return self._frame
+
+    def _column_names(self):
+        return self._frame.columns
+
+    def _project(self, names, filters):
+        """
+        Returns a DataFrame with at least the columns in names and the rows that may verify the
+        filters.
+        """
+        return self._frame
+
+    @staticmethod
+    def _mask(frame, filters):
+        """
+        Returns the boolean Series selecting the rows of frame verifying all the filters, True if
+        there are none, or None if any of them can't be computed on the columns.
+        Null cells, and values the column can't be compared with, are compared as the rows do,
+        so such filters are not computed here.
+        """
+        mask = True
+        for node in filters:
+            attr, op, value = node if len(node) == 3 else (node[0], '==', node[1])
+            column = frame[attr]
+            if column.isnull().any():
+                return None
+            elif op == 'present':
+                selected = pandas.Series(bool(value), index=frame.index)
+            elif op in _MASK_OPERATORS and not is_collection(value):
+                if column.dtype.kind in 'biufc' and not isinstance(value, (int, long, float)):
+                    # e.g: a string compared with a numeric column, compared as the rows do
+                    return None
+                try:
+                    selected = _MASK_OPERATORS[op](column, value)
+                except TypeError:
+                    return None
+            elif op in ('in', 'not in') and is_collection(value):
+                selected = column.isin(list(value)) == (op == 'in')
+            else:
+                return None
+            mask = selected if mask is True else mask & selected
+        return mask
+
+
+class FrameSelector(Selector):
+    """
+    Selector over a column, verifying is_, is_not, matches and has_length with vectorized
+    operations. Any other validation runs on the list of the values in the column.
+    """
+
+    def __init__(self, column, path, min_checks, max_checks):
+        super(FrameSelector, self).__init__(None, path, min_checks, max_checks)
+        self._column = column
+        self._log_selection = column
+
+    @property
+    def _selection(self):
+        if self._values is None:
+            self._values = to_dict(self._column)
+        return self._values
+
+    @_selection.setter
+    def _selection(self, values):
+        self._values = values
+
+    def is_(self, *content):
+        for item in content:
+            if is_collection(item):
+                super(FrameSelector, self).is_(item)
+            else:
+                self._verify(item, self._is_none() if item is None else self._column == item)
+
+    def is_not(self, *content):
+        for item in content:
+            if is_collection(item):
+                super(FrameSelector, self).is_not(item)
+            else:
+                self._verify(item, ~self._is_none() if item is None else self._column != item)
+
+    def matches(self, *content):
+        for regex in content:
+            matched = self._column.str.contains(regex) if self._is_text() else None
+            if matched is None or matched.isnull().any():
+                # only strings are matched on the column
+                super(FrameSelector, self).matches(regex)
+            else:
+                self._verify(regex, matched.astype(bool))
+
+    def has_length(self, content, **options):
+        lengths = self._column.str.len() if self._is_text() else None
+        verified = None
+        if lengths is not None and not lengths.isnull().any():
+            verified = options.get("cmp", operator.eq)(lengths, content)
+        if isinstance(verified, pandas.Series) and verified.dtype == bool:
+            self._verify(content, verified)
+        else:
+            super(FrameSelector, self).has_length(content, **options)
+
+    def _is_none(self):
+        # NaN cells are not None in the rows either
+        return pandas.Series([value is None for value in self._column.values],
+                             index=self._column.index, dtype=bool)
+
+    def _is_text(self):
+        return self._column.dtype == object and len(self._column) > 0
+
+    def _verify(self, printable_obj, verified):
+        def locate(verifying):
+            failing = verified.index[(verified == verifying).values][:MAX_LOCATED_FAILURES]
+            # the column is the last node in the path, and there is no path for Series
+            return [(label, self._log_path[-1]) if self._log_path else label
+                    for label in failing]
+
+        self._verify_count(printable_obj, int(verified.sum()), locate)
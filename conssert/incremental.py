@@ -0,0 +1,203 @@
+"""
+This module provides an Assertable that keeps its validations and re-verifies them when the object
+under test changes, re-evaluating only the elements that changed since the last verification.
+"""
+
+from conssert import Assertable
+from conssert.index import FilterIndex
+from conssert.navigate import *
+
+
+class ResultCache(object):
+    """
+    Remembers the result of checking selection elements against assertion inputs.
+    Collections are remembered by identity and any other element by value, so the cache is only
+    valid as long as the remembered collections are not mutated in place.
+    Entries not used during the last verification are dropped when the next one starts.
+    Every verification numbers its comparisons in the order they are built (see comparison), so
+    the results of comparisons sharing an input but not their comparator are kept apart.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._previous = {}
+        self._comparisons = 0
+
+    def start(self):
+        self._previous, self._entries = self._entries, {}
+        self._comparisons = 0
+
+    def comparison(self):
+        """
+        Returns the number of the next comparison of the current verification, to be looked up
+        along with its input.
+        """
+        self._comparisons += 1
+        return self._comparisons
+
+    def lookup(self, input_arg, element, check):
+        key = ResultCache._key(input_arg, element)
+        if key is None:
+            return check()
+        entry = self._entries.get(key) or self._previous.get(key)
+        if entry is None or (is_collection(element) and entry[0] is not element):
+            entry = (element, check())
+        self._entries[key] = entry
+        return entry[1]
+
+    @staticmethod
+    def _key(input_arg, element):
+        element_key = ('id', id(element)) if is_collection(element) \
+            else ('value', type(element), element)
+        key = (to_tuples(input_arg), element_key)
+        try:
+            hash(key)
+            return key
+        except TypeError:
+            return None
+
+
+class _Invariant(object):
+
+    def __init__(self, quantifier, path, check, args, options):
+        self.quantifier = quantifier
+        self.path = path
+        self.check = check
+        self.args = args
+        self.options = options
+        self.cache = ResultCache()
+
+    def root_key(self, prefix_path):
+        full_path = prefix_path + split_and_reduce([self.path])
+        # wildcards and descendant lookups ('..key') may select under any root key
+        if full_path and not is_tuple(full_path[0]) and full_path[0] not in ("*", "**") \
+                and not is_descendant_lookup(full_path[0]):
+            return full_path[0]
+
+
+class IncrementalAssertable(Assertable):
+    """
+    Assertable remembering its invariants so they can be verified again after the object under
+    test is mutated, without rebuilding the whole Assertable.
+    """
+
+    def __init__(self, data, prefix_path=[]):
+        """
+        Args:
+            data (dict, list): object under test; it may be mutated between refreshes.
+            prefix_path (str, list): path of the object tree under test.
+        """
+        super(IncrementalAssertable, self).__init__(data, prefix_path)
+        self._source = data
+        self._invariants = []
+
+    def invariant(self, quantifier, path, check, *args, **options):
+        """
+        Verifies a validation and remembers it, so it is verified again on every refresh.
+        quantifier is the name of the selector method (e.g: 'every'), a tuple with the name and the
+        number of checks (e.g: ('exactly', 2)), or None to select as in self(path).
+        check is the name of the Selector method called with args and options, e.g:
+            invariant('every', 'albums year', 'has', 1970, cmp=operator.gt)
+        """
+        invariant = _Invariant(quantifier, path, check, args, options)
+        self._verify(invariant)
+        self._invariants.append(invariant)
+
+    def refresh(self, *changed):
+        """
+        Verifies all the invariants again against the current content of the object under test.
+        If changed keys (or indexes) of the root object are given, only those are normalized again
+        and invariants that do not go through them are skipped. Otherwise the whole object is
+        normalized and diffed against the previous snapshot.
+        In both cases only the elements that changed are checked again.
+        """
+        source = self._source
+        if changed and (is_list(source) or is_tuple(source) or is_dict(self._data)):
+            root_keys = self._renormalize(changed)
+        else:
+            self._data, _ = _share_unchanged(self._data, to_dict(self._source))
+            root_keys = None
+        self._index = None
+        self._filter_index = FilterIndex()
+        self._canonical = Canonicalizer()
+
+        for invariant in self._invariants:
+            root_key = invariant.root_key(self._prefix_path)
+            if root_keys is None or root_key is None or root_key in root_keys:
+                self._verify(invariant)
+
+    def _verify(self, invariant):
+        self._memo = invariant.cache
+        invariant.cache.start()
+        try:
+            selector = self._quantified(invariant.quantifier, invariant.path)
+            getattr(selector, invariant.check)(*invariant.args, **invariant.options)
+        finally:
+            self._memo = None
+
+    def _renormalize(self, changed):
+        # the root container is copied so that it is never remembered with stale content
+        source = self._source
+        if is_list(source) or is_tuple(source):
+            data = list(self._data[:len(source)])
+            data.extend(to_dict(item) for item in source[len(data):])
+            for index in changed:
+                if index < len(source):
+                    data[index] = _share_unchanged(data[index], to_dict(source[index]))[0]
+            self._data = data
+            return None
+
+        data = dict(self._data)
+        for key in changed:
+            value = _child(source, key)
+            if value is _missing:
+                data.pop(key, None)
+            else:
+                normalized = to_dict(value, [(key, value)])
+                data[key] = _share_unchanged(data[key], normalized)[0] if key in data \
+                    else normalized
+        self._data = data
+        return set(changed)
+
+
+_missing = object()
+
+
+def _child(source, key):
+    if is_dict(source):
+        return source.get(key, _missing)
+    value = getattr(source, key, _missing)
+    if key.startswith('_') or callable(value):
+        return _missing
+    return value
+
+
+def _share_unchanged(old, new):
+    """
+    Returns new with every subtree equal to the one in old replaced by the old one, so that
+    unchanged nodes keep their identity. The second element returned tells if anything changed.
+    """
+    if is_dict(old) and is_dict(new):
+        shared = {}
+        changed = len(old) != len(new)
+        for key, value in new.items():
+            if key in old:
+                shared[key], child_changed = _share_unchanged(old[key], value)
+                changed = changed or child_changed
+            else:
+                shared[key], changed = value, True
+        return (shared, True) if changed else (old, False)
+
+    if is_list(old) and is_list(new):
+        shared = []
+        changed = len(old) != len(new)
+        for old_item, new_item in zip(old, new):
+            item, item_changed = _share_unchanged(old_item, new_item)
+            shared.append(item)
+            changed = changed or item_changed
+        shared.extend(new[len(old):])
+        return (shared, True) if changed else (old, False)
+
+    if is_collection(old) or is_collection(new) or type(old) is not type(new):
+        return new, True
+    return (new, True) if old != new else (old, False)
@@ -0,0 +1,173 @@
+"""
+This module provides indexes over normalized object trees, built once and shared by all the
+selections of an Assertable.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from conssert.navigate import *
+
+
+class PathIndex(object):
+    """
+    Keeps the leaves of a tree in walk order, and for every container in the tree the range of
+    its leaves, so the leaves under any node are found without walking it again.
+    Containers are also numbered in depth-first order, and the values of every key are kept sorted
+    by the number of the dict holding them, so the values of a key under any node are found by
+    bisection.
+    The tree must not be modified once indexed.
+    """
+
+    def __init__(self, root):
+        self._leaves = []
+        self._ranges = {}
+        self._keys = {}
+        self._containers = 0
+        self._index(root)
+
+    def _index(self, node):
+        node_kind = kind(node)
+        if not node_kind & (LIST | DICT):
+            self._leaves.append(node)
+            return
+
+        position = self._containers
+        self._containers += 1
+        start = len(self._leaves)
+        if node_kind & LIST:
+            for item in node:
+                self._index(item)
+        else:
+            for key, value in node.items():
+                positions, values = self._keys.setdefault(key, ([], []))
+                positions.append(position)
+                values.append(value)
+            for value in node.values():
+                self._index(value)
+        # the node is kept so its id can't be reused by another object
+        self._ranges[id(node)] = (node, start, len(self._leaves), position, self._containers)
+
+    def leaves(self, obj):
+        """
+        Returns the same as expand_last_level(obj).
+        """
+        entry = self._ranges.get(id(obj))
+        if entry is not None and entry[0] is obj:
+            return self._leaves[entry[1]:entry[2]]
+        elif is_list(obj):
+            return [leaf for item in obj for leaf in self.leaves(item)]
+        elif is_dict(obj):
+            return [leaf for value in obj.values() for leaf in self.leaves(value)]
+        return [obj]
+
+    def descendants(self, obj, key):
+        """
+        Returns the same as find_key(obj, key).
+        """
+        entry = self._ranges.get(id(obj))
+        if entry is not None and entry[0] is obj:
+            positions, values = self._keys.get(key, ([], []))
+            return values[bisect_left(positions, entry[3]):bisect_left(positions, entry[4])]
+        elif is_list(obj):
+            return [value for item in obj for value in self.descendants(item, key)]
+        return find_key(obj, key)
+
+
+class FilterIndex(object):
+    """
+    Indexes the values of an attribute in the lists of records filtered by it more than once,
+    with a hash index for '==' and 'in' filters and a sorted index for range filters.
+    Lists filtered only once are just scanned. The lists must not be modified once indexed.
+    Only the last MAX_SEEN lists filtered once are remembered, so lists that are never filtered
+    again are not kept alive.
+    """
+
+    MAX_SEEN = 32
+
+    def __init__(self):
+        self._seen = OrderedDict()
+        self._indexes = {}
+
+    def filter(self, col, attr, op, value):
+        """
+        Returns the same as filter_nodes(col, attr, op, value).
+        """
+        if not is_list(col) or op not in _AttributeIndex.OPERATORS:
+            return filter_nodes(col, attr, op, value)
+
+        key = (id(col), attr)
+        entry = self._indexes.get(key)
+        if entry is None or entry[0] is not col:
+            seen = self._seen.pop(key, None)
+            if seen is not col:
+                # the list is kept so its id can't be reused by another object
+                self._seen[key] = col
+                if len(self._seen) > self.MAX_SEEN:
+                    self._seen.popitem(last=False)
+                return filter_nodes(col, attr, op, value)
+            entry = self._indexes[key] = (col, _AttributeIndex(col, attr))
+
+        positions = entry[1].positions(op, value)
+        if positions is None:
+            return filter_nodes(col, attr, op, value)
+        return [col[position] for position in positions]
+
+
+class _AttributeIndex(object):
+
+    OPERATORS = ('==', 'in', '<', '<=', '>', '>=')
+
+    def __init__(self, col, attr):
+        indexed = [(item[attr], position) for position, item in enumerate(col)
+                   if is_dict(item) and attr in item]
+        self._kind = _comparable_kind([value for value, _ in indexed])
+        if self._kind is not None:
+            self._sorted_values, self._sorted_positions = map(list, zip(*sorted(indexed))) \
+                if indexed else ([], [])
+        self._by_value = {}
+        try:
+            for value, position in indexed:
+                self._by_value.setdefault(value, []).append(position)
+        except TypeError:
+            self._by_value = None
+
+    def positions(self, op, value):
+        """
+        Returns the sorted positions of the records verifying the filter, or None if the index
+        can't answer it.
+        """
+        if op == '==':
+            return self._equal([value])
+        elif op == 'in':
+            return self._equal(value) if is_list(value) or is_tuple(value) or is_set(value) \
+                else None
+        elif self._kind is None or _comparable_kind([value]) != self._kind:
+            return None
+
+        values = self._sorted_values
+        lower, upper = {'<': (0, bisect_left(values, value)),
+                        '<=': (0, bisect_right(values, value)),
+                        '>': (bisect_right(values, value), len(values)),
+                        '>=': (bisect_left(values, value), len(values))}[op]
+        return sorted(self._sorted_positions[lower:upper])
+
+    def _equal(self, values):
+        if self._by_value is None:
+            return None
+        try:
+            positions = set(position for value in values
+                            for position in self._by_value.get(value, []))
+        except TypeError:
+            return None
+        return sorted(positions)
+
+
+def _comparable_kind(values):
+    # values are only sorted when all of them compare to each other as the scan would do it
+    if all(isinstance(value, (int, long, float)) and not isinstance(value, bool) and
+           value == value for value in values):
+        return 'number'
+    elif all(is_str(value) for value in values):
+        return 'string'
+    return None
@@ -0,0 +1,60 @@
+"""
+This module provides the hash joins used to verify references between selections: one side is
+hashed once by the canonical form of its keys (see to_tuples) and every element of the other one
+probes it once, instead of selecting one side once for every element of the other one.
+It also provides the single pass hash groupings used to verify keys within a selection.
+"""
+
+from conssert.navigate import *
+
+
+def key_set(values, canonical=to_tuples):
+    """
+    Returns the set of the canonical forms of values.
+    """
+    return set(canonical(value) for value in values)
+
+
+def key_getter(keys, canonical=to_tuples):
+    """
+    Returns a function extracting the canonical form of the value of keys (a key or a list of
+    keys, for composite keys) from a record, or MISSING if the record lacks any of them.
+    """
+    if not is_list(keys) and not is_tuple(keys):
+        key = keys
+        return lambda record: canonical(record[key]) \
+            if is_dict(record) and key in record else MISSING
+
+    keys = list(keys)
+
+    def get(record):
+        if not is_dict(record) or any(key not in record for key in keys):
+            return MISSING
+        return tuple(canonical(record[key]) for key in keys)
+    return get
+
+
+def hash_table(records, key):
+    """
+    Returns a dict with the list of the records in records having each key, as returned by key
+    (see key_getter). Records whose key is MISSING are left out, so they don't match any record.
+    """
+    table = {}
+    for record in records:
+        record_key = key(record)
+        if record_key is not MISSING:
+            table.setdefault(record_key, []).append(record)
+    return table
+
+
+def group_counts(records, key):
+    """
+    Returns a dict with the number of records in records having each key, as returned by key
+    (see key_getter), in a single pass. Records whose key is MISSING are not counted.
+    """
+    counts = {}
+    for record in records:
+        record_key = key(record)
+        if record_key is not MISSING:
+            counts[record_key] = counts.get(record_key, 0) + 1
+    return counts
@@ -0,0 +1,99 @@
+"""
+This module replays the selection of a path keeping track of where every selected node is in the
+object tree, so failures can point at the elements that caused them.
+Locations are only computed when reporting failures, so verifications don't pay for them.
+
+The location of a node is the tuple of keys and indexes leading to it from the root. Selections
+built by the path steps (e.g: filters, '*') are lists that are not in the tree; their location is
+the list of the locations of their items instead.
+"""
+
+from conssert.navigate import *
+
+
+def locate(obj, path, force_path_present, loc=()):
+    """
+    Returns the selection of path in obj (as Assertable would build it) and its location.
+    """
+    for lookup_node in path:
+        obj, loc = _locate_step(obj, loc, lookup_node, force_path_present)
+    return obj, loc
+
+
+def item_locations(obj, loc):
+    """
+    Returns the locations of the items in the list obj located at loc.
+    """
+    if is_list(loc):
+        return loc
+    return [_child(loc, index) for index in range(len(obj))]
+
+
+def _child(loc, key):
+    return loc + (key,) if is_tuple(loc) else None
+
+
+def _locate_step(obj, loc, lookup_node, force_path_present):
+    while is_super_list(obj):
+        loc = [item_loc for item, sublist_loc in zip(obj, item_locations(obj, loc))
+               for item_loc in item_locations(item, sublist_loc)]
+        obj = flatten(obj)
+
+    if is_tuple(lookup_node):
+        if len(lookup_node) == 3:
+            selected = filter_predicate(*lookup_node)
+        else:
+            (attr, value) = lookup_node
+            selected = lambda item: item[attr] == value
+        return _unzip((item, item_loc) for item, item_loc in zip(obj, item_locations(obj, loc))
+                      if selected(item))
+
+    elif lookup_node == "**":
+        return _unzip(_located_leaves(obj, loc))
+
+    elif is_descendant_lookup(lookup_node):
+        return _unzip(_located_values(obj, loc, lookup_node[2:]))
+
+    elif lookup_node == "*":
+        if is_dict(obj):
+            return obj.values(), [_child(loc, key) for key in obj.keys()]
+        return _unzip((item.values(), [_child(item_loc, key) for key in item.keys()])
+                      for item, item_loc in zip(obj, item_locations(obj, loc))
+                      if is_collection(obj))
+
+    elif is_dict(obj):
+        if force_path_present or lookup_node in obj:
+            return obj[lookup_node], _child(loc, lookup_node)
+        return [], []
+
+    traversable = lambda col: force_path_present or (is_collection(col) and lookup_node in col)
+    return _unzip((item[lookup_node], _child(item_loc, lookup_node))
+                  for item, item_loc in zip(obj, item_locations(obj, loc)) if traversable(item))
+
+
+def _located_leaves(obj, loc):
+    obj_kind = kind(obj)
+    if obj_kind & LIST:
+        return [leaf for item, item_loc in zip(obj, item_locations(obj, loc))
+                for leaf in _located_leaves(item, item_loc)]
+    elif obj_kind & DICT:
+        return [leaf for key, value in obj.items()
+                for leaf in _located_leaves(value, _child(loc, key))]
+    return [(obj, loc)]
+
+
+def _located_values(obj, loc, key):
+    obj_kind = kind(obj)
+    if obj_kind & LIST:
+        return [found for item, item_loc in zip(obj, item_locations(obj, loc))
+                for found in _located_values(item, item_loc, key)]
+    elif obj_kind & DICT:
+        found = [(obj[key], _child(loc, key))] if key in obj else []
+        return found + [value for child_key, child in obj.items()
+                        for value in _located_values(child, _child(loc, child_key), key)]
+    return []
+
+
+def _unzip(located):
+    located = list(located)
+    return [node for node, _ in located], [node_loc for _, node_loc in located]
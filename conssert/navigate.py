@@ -1,4 +1,9 @@
+from collections import Mapping, Sequence
 from functools import partial
+from inspect import getmro
+from types import GeneratorType, InstanceType
+import operator
+import re
 
 
 def T(type_, obj):
@@ -8,15 +13,47 @@ def T(type_, obj):
     return isinstance(obj, type_)
 
 
-is_list = partial(T, list)
+# kinds of nodes, combined as flags by kind()
+LIST, DICT, TUPLE, SET, STRING = 1, 2, 4, 8, 16
 
-is_dict = partial(T, dict)
+COLLECTION = LIST | DICT | TUPLE | SET
 
-is_tuple = partial(T, tuple)
+_KIND_TYPES = ((list, LIST), (dict, DICT), (tuple, TUPLE), (set, SET), (basestring, STRING))
 
-is_set = partial(T, set)
+_kinds = {}
 
-is_str = partial(T, basestring)
+
+def kind(obj):
+    """
+    Returns the kind of obj: the LIST, DICT, TUPLE, SET and STRING flags of the types obj is an
+    instance of, or 0 if none. It is computed once per type, so classifying a node is a dict lookup.
+    """
+    cls = type(obj)
+    try:
+        return _kinds[cls]
+    except KeyError:
+        _kinds[cls] = sum(flag for type_, flag in _KIND_TYPES if issubclass(cls, type_))
+        return _kinds[cls]
+
+
+def is_list(obj):
+    return isinstance(obj, list)
+
+
+def is_dict(obj):
+    return isinstance(obj, dict)
+
+
+def is_tuple(obj):
+    return isinstance(obj, tuple)
+
+
+def is_set(obj):
+    return isinstance(obj, set)
+
+
+def is_str(obj):
+    return isinstance(obj, basestring)
 
 
 def is_juicy_list(obj):
@@ -37,7 +74,7 @@ def is_collection(obj):
     """
     Returns True if obj is a list, dict, tuple or set.
     """
-    return is_list(obj) or is_dict(obj) or is_tuple(obj) or is_set(obj)
+    return kind(obj) & COLLECTION != 0
 
 
 def flatten(lst):
@@ -81,51 +118,239 @@ def to_numeric_bool(cond, col=None):
         return 1 if cond else 0
 
 
+def mean(values):
+    """
+    Returns the arithmetic mean of values, iterated once. Raises ValueError if there are none.
+    """
+    if is_list(values) or is_tuple(values):
+        count, total = len(values), sum(values)
+    else:
+        count, total = 0, 0
+        for value in values:
+            count += 1
+            total += value
+    if not count:
+        raise ValueError("mean of no values")
+    return float(total) / count
+
+
+_SCALAR_TYPES = frozenset([int, long, float, bool, str, unicode, type(None)])
+
+
 def to_tuples(col):
     """
     Recursively creates a tuple from every element in col
     """
-    if not is_collection(col):
+    if type(col) in _SCALAR_TYPES:
         return col
-    elif is_dict(col):
-        return tuple(to_tuples(item) for item in col.items())
-    else:
-        return tuple(to_tuples(item) for item in col)
+    col_kind = kind(col)
+    if col_kind & DICT:
+        return tuple([(to_tuples(key), to_tuples(value)) for key, value in col.items()])
+    elif col_kind & COLLECTION:
+        return tuple([to_tuples(item) for item in col])
+    return col
+
+
+class Canonicalizer(object):
+    """
+    Returns the same as to_tuples, remembering the result for every collection by identity, so
+    subtrees shared or canonicalized again (e.g: by several validations on the same selection)
+    are only rebuilt once. The collections must not be modified while remembered.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, col):
+        if type(col) in _SCALAR_TYPES:
+            return col
+        entry = self._cache.get(id(col))
+        if entry is not None and entry[0] is col:
+            return entry[1]
+        col_kind = kind(col)
+        if col_kind & DICT:
+            canonical = tuple([(self(key), self(value)) for key, value in col.items()])
+        elif col_kind & COLLECTION:
+            canonical = tuple([self(item) for item in col])
+        else:
+            return col
+        # the collection is kept so its id can't be reused by another object
+        self._cache[id(col)] = (col, canonical)
+        return canonical
 
 
 def to_dict(obj, visited=None):
     """
     Recursively creates a dict from obj attributes and its values, skipping private and callable attributes.
     When a cycle is found, the visited node is replaced with an empty dict.
+    Objects are converted by the adapter of their class (see register_adapter).
     """
-    visited = visited or []
-    if is_list(obj) or is_tuple(obj) or is_set(obj):
-        return map(lambda x: to_dict(x, visited), obj)
-    elif hasattr(obj, '__dict__'):
-        return dict([(k, to_dict(v, visited + [(k, v)])) for k, v in vars(obj).items()
-                     if not k.startswith('_') and not callable(v) and not (k, v) in visited])
-    elif is_dict(obj):
-        return dict([(k, to_dict(v, visited + [(k, v)])) for k, v in obj.items()
-                     if not (k, v) in visited])
-    else:
+    return _to_dict(obj, set((key, id(value)) for key, value in visited or []))
+
+
+def _to_dict(obj, visited):
+    cls = type(obj)
+    if cls in _SCALAR_TYPES:
+        return obj
+    if cls is InstanceType:
+        cls = obj.__class__
+    adapter = _adapters_by_class.get(cls)
+    if adapter is None:
+        adapter = _adapters_by_class[cls] = _resolve_adapter(cls)
+
+    converted = adapter(obj)
+    if converted is not obj and type(converted) not in (dict, list) and \
+            isinstance(converted, (dict, list)):
+        # e.g: an OrderedDict returned by a registered adapter, converted in turn
+        return _to_dict(converted, visited)
+    if type(converted) is list:
+        return [_to_dict(item, visited) for item in converted]
+    elif type(converted) is not dict:
+        return converted
+
+    normalized = {}
+    for key, value in converted.items():
+        # cycles are detected by identity, following the keys from the root to the current node
+        entry = (key, id(value))
+        if entry not in visited:
+            visited.add(entry)
+            normalized[key] = _to_dict(value, visited)
+            visited.discard(entry)
+    return normalized
+
+
+_registered_adapters = {}
+
+_adapters_by_class = {}
+
+
+def register_adapter(cls, adapter):
+    """
+    Makes to_dict convert the instances of cls and its subclasses with adapter, e.g:
+        register_adapter(Row, lambda row: dict(zip(row.keys(), row)))
+    adapter(obj) must return a dict or a list, whose values are converted in turn, or any other
+    object, which is kept as it is.
+    """
+    _registered_adapters[cls] = adapter
+    _adapters_by_class.clear()
+
+
+def unregister_adapter(cls):
+    """
+    Removes the adapter registered for cls, if any (see register_adapter).
+    """
+    _registered_adapters.pop(cls, None)
+    _adapters_by_class.clear()
+
+
+def _resolve_adapter(cls):
+    # resolved once per class, so converting an object only costs a dict lookup
+    for base in getmro(cls):
+        if base in _registered_adapters:
+            return _registered_adapters[base]
+
+    if cls is dict or cls is list:
+        return _identity
+    elif issubclass(cls, tuple) and hasattr(cls, '_fields'):
+        fields = tuple(cls._fields)
+        return lambda obj: dict(zip(fields, obj))
+    elif issubclass(cls, (list, tuple, set, frozenset, GeneratorType)):
+        return list
+    elif issubclass(cls, (dict, Mapping)):
+        return lambda obj: dict(obj.items())
+    elif issubclass(cls, Sequence) and not issubclass(cls, basestring):
+        return list
+    elif hasattr(cls, '__dataclass_fields__'):
+        fields = tuple(name for name in cls.__dataclass_fields__ if not name.startswith('_'))
+        return lambda obj: dict((name, getattr(obj, name)) for name in fields)
+
+    slots = _public_slots(cls)
+    if slots:
+        return partial(_slot_attributes, slots)
+    return _attributes
+
+
+def _identity(obj):
+    return obj
+
+
+def _public_slots(cls):
+    slots = []
+    for base in getmro(cls):
+        base_slots = vars(base).get('__slots__', ())
+        for name in [base_slots] if is_str(base_slots) else base_slots:
+            if not name.startswith('_') and name not in slots:
+                slots.append(name)
+    return tuple(slots)
+
+
+def _slot_attributes(slots, obj):
+    attributes = _attributes(obj) if hasattr(obj, '__dict__') else {}
+    for name in slots:
+        value = getattr(obj, name, MISSING)
+        if value is not MISSING and not callable(value):
+            attributes[name] = value
+    return attributes
+
+
+def _attributes(obj):
+    if not hasattr(obj, '__dict__'):
         return obj
+    return dict([(k, v) for k, v in vars(obj).items() if not k.startswith('_') and not callable(v)])
 
 
-def unique(col):
+def unique(col, canonical=to_tuples):
     """
-    Returns the unique elements in col (recursive)
+    Returns the unique elements in col (recursive).
+    canonical is the function building the canonical form of col; e.g: a Canonicalizer
     """
-    unique_elements = to_tuples(col.items()) if is_dict(col) else set(to_tuples(col))
+    elements = canonical(col)
+    unique_elements = elements if is_dict(col) else set(elements)
     return tuple(sorted(unique_elements))
 
 
+FILTER_OPERATORS = {'==': operator.eq,
+                    '!=': operator.ne,
+                    '<': operator.lt,
+                    '<=': operator.le,
+                    '>': operator.gt,
+                    '>=': operator.ge,
+                    'in': lambda x, values: x in values,
+                    'not in': lambda x, values: x not in values,
+                    '~': lambda x, regex: is_str(x) and regex.search(x) is not None}
+
+
+def filter_nodes(col, attr, op, value):
+    """
+    Returns the dicts in col whose attr value verifies the filter operator op with value, e.g:
+    ('year', '>', 1970), ('genre', 'in', ['Blues Rock', 'Hard Rock']) or ('title', '~', '^The').
+    Dicts without attr are skipped, except for op 'present': ('uk chart', 'present', False)
+    returns the dicts without 'uk chart'.
+    """
+    selected = filter_predicate(attr, op, value)
+    return [item for item in col if selected(item)]
+
+
+def filter_predicate(attr, op, value):
+    """
+    Returns the function telling if an item is selected by the filter (see filter_nodes).
+    """
+    if op == 'present':
+        return lambda item: is_dict(item) and (attr in item) == bool(value)
+    if op not in FILTER_OPERATORS:
+        raise ValueError("Unknown filter operator {}".format(op))
+    fn = FILTER_OPERATORS[op]
+    value = re.compile(value) if op == '~' else value
+    return lambda item: is_dict(item) and attr in item and fn(item[attr], value)
+
+
 def multi_get(dict_, keys):
     """
     Recursively looks up keys in dict_
     """
-    if not is_dict(dict_) or not keys:
+    if not kind(dict_) & DICT or not keys:
         return dict_
-    if not is_collection(keys):
+    if not kind(keys) & COLLECTION:
         return dict_.get(keys)
     return multi_get(dict_.get(keys[0]), keys[-1] if len(keys) > 1 else None)
 
@@ -134,19 +359,70 @@ def walk(obj, _path_so_far=[]):
     """
     Returns a list of all the paths in the tree obj
     """
-    if is_list(obj):
-        return reduce(lambda accum, next_node: accum + walk(next_node, _path_so_far), obj, [])
-    elif is_dict(obj):
-        return reduce(lambda accum, (current_node, next_node):
-                      accum + walk(next_node, _path_so_far + [current_node]), obj.items(), [])
-    return [_path_so_far + [obj]]
+    paths = []
+    _walk(obj, _path_so_far, paths)
+    return paths
+
+
+def _walk(obj, path, paths):
+    obj_kind = kind(obj)
+    if obj_kind & LIST:
+        for next_node in obj:
+            _walk(next_node, path, paths)
+    elif obj_kind & DICT:
+        for current_node, next_node in obj.items():
+            _walk(next_node, path + [current_node], paths)
+    else:
+        paths.append(path + [obj])
+
+
+def is_descendant_lookup(obj):
+    """
+    Returns True if obj is a path node like '..key', that selects key at any depth.
+    """
+    return is_str(obj) and len(obj) > 2 and obj.startswith('..')
+
+
+def find_key(obj, key):
+    """
+    Returns the values stored under key at any depth in the tree obj, in depth-first order.
+    """
+    found = []
+    _find_key(obj, key, found)
+    return found
+
+
+def _find_key(obj, key, found):
+    obj_kind = kind(obj)
+    if obj_kind & LIST:
+        for item in obj:
+            _find_key(item, key, found)
+    elif obj_kind & DICT:
+        if key in obj:
+            found.append(obj[key])
+        for child in obj.values():
+            _find_key(child, key, found)
 
 
 def expand_last_level(obj):
     """
     Returns a list of the leaf nodes in the tree obj
     """
-    return [nodes[-1] for nodes in walk(obj) if nodes]
+    leaves = []
+    _leaves(obj, leaves)
+    return leaves
+
+
+def _leaves(obj, leaves):
+    obj_kind = kind(obj)
+    if obj_kind & LIST:
+        for item in obj:
+            _leaves(item, leaves)
+    elif obj_kind & DICT:
+        for value in obj.values():
+            _leaves(value, leaves)
+    else:
+        leaves.append(obj)
 
 
 def expand_one_level(obj):
@@ -157,3 +433,99 @@ def expand_one_level(obj):
         return obj.values()
     else:
         return [item.values() for item in obj if is_collection(obj)]
+
+
+class _Missing(object):
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+
+def diff(expected, actual, key=None, _path=None):
+    """
+    Returns a list of (path, expected value, actual value) with the places where actual does not
+    contain expected. Paths address the expected tree and MISSING marks absent values.
+    Dicts in actual may have more keys than expected; items in an expected list must be contained in
+    different items of the actual list. Items are aligned by the value of key when they are dicts
+    holding it, otherwise by equality (hashing); only items not aligned that way are searched for.
+    """
+    path = _path or []
+    if is_dict(expected) and is_dict(actual):
+        differences = []
+        for expected_key, expected_value in expected.items():
+            if expected_key in actual:
+                differences.extend(
+                    diff(expected_value, actual[expected_key], key, path + [expected_key]))
+            else:
+                differences.append((path + [expected_key], expected_value, MISSING))
+        return differences
+    elif _is_sequence(expected) and _is_sequence(actual):
+        return _diff_sequences(list(expected), list(actual), key, path)
+    return [] if expected == actual else [(path, expected, actual)]
+
+
+def _is_sequence(obj):
+    return kind(obj) & (LIST | TUPLE | SET) != 0
+
+
+def _hashed(obj):
+    try:
+        canonical = to_tuples(obj)
+        hash(canonical)
+        return canonical
+    except TypeError:
+        return None
+
+
+def _diff_sequences(expected, actual, key, path):
+    by_key, by_hash = {}, {}
+    for index, item in enumerate(actual):
+        if key is not None and is_dict(item) and key in item:
+            by_key.setdefault(item[key], []).append(index)
+        canonical = _hashed(item)
+        if canonical is not None:
+            by_hash.setdefault(canonical, []).append(index)
+
+    def take(indexes):
+        while indexes:
+            index = indexes.pop(0)
+            if index not in used:
+                used.add(index)
+                return index
+
+    used = set()
+    differences = []
+    pending = []
+    for index, item in enumerate(expected):
+        if key is not None and is_dict(item) and key in item:
+            actual_index = take(by_key.get(item[key], []))
+            if actual_index is None:
+                differences.append((path + [index], item, MISSING))
+            else:
+                differences.extend(diff(item, actual[actual_index], key, path + [index]))
+        elif take(by_hash.get(_hashed(item), [])) is None:
+            pending.append(index)
+
+    # the rest of the items are matched with the actual items containing them, with augmenting
+    # paths (an item may take the actual item of another one that can move to a free one), so
+    # that items are reported missing only if no matching contains them all
+    free = [i for i in range(len(actual)) if i not in used]
+    candidates = dict((index, [i for i in free if not diff(expected[index], actual[i], key)])
+                      for index in pending)
+    matched = {}
+
+    def augment(index, visited):
+        for i in candidates[index]:
+            if i not in visited:
+                visited.add(i)
+                if i not in matched or augment(matched[i], visited):
+                    matched[i] = index
+                    return True
+        return False
+
+    for index in pending:
+        if not augment(index, set()):
+            differences.append((path + [index], expected[index], MISSING))
+    return differences
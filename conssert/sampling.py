@@ -0,0 +1,50 @@
+"""
+This module provides the random sampling used to verify validations on a subset of big selections.
+"""
+
+import math
+import random
+
+
+def reservoir_sample(iterable, size, seed=None):
+    """
+    Returns up to size elements uniformly sampled from iterable in a single pass, in their original
+    order, and the number of elements in iterable.
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    count = 0
+    for count, element in enumerate(iterable, 1):
+        if len(reservoir) < size:
+            reservoir.append((count, element))
+        else:
+            position = rng.randint(0, count - 1)
+            if position < size:
+                reservoir[position] = (count, element)
+    return [element for _, element in sorted(reservoir, key=lambda entry: entry[0])], count
+
+
+def sample_size(error_rate, confidence=0.95):
+    """
+    Returns the number of elements to sample so that, if more than error_rate of the population
+    fails a check, at least one failing element is sampled with the given confidence.
+    Both error_rate and confidence must be between 0 and 1, exclusive.
+    """
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate must be between 0 and 1, exclusive, got {}".format(error_rate))
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1, exclusive, got {}".format(confidence))
+    return int(math.ceil(math.log(1 - confidence) / math.log(1 - error_rate)))
+
+
+def wilson_interval(successes, trials, z=1.96):
+    """
+    Returns the bounds of the Wilson score interval for the rate of successes (95% by default).
+    """
+    if not trials:
+        return 0.0, 1.0
+    rate = float(successes) / trials
+    denominator = 1 + z * z / trials
+    center = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
@@ -0,0 +1,108 @@
+"""
+This module provides fixed size probabilistic sketches to count distinct elements and to find
+duplicate candidates in selections too big to keep all their canonical elements in memory.
+"""
+
+import math
+
+from conssert.navigate import to_tuples
+
+
+_MASK_64 = (1 << 64) - 1
+
+
+def fingerprint(obj):
+    """
+    Returns a well mixed 64 bits hash of the canonical form of obj (see to_tuples).
+    """
+    return _mix(hash(to_tuples(obj)))
+
+
+def _mix(h):
+    h &= _MASK_64
+    h ^= h >> 33
+    h = (h * 0xff51afd7ed558ccd) & _MASK_64
+    h ^= h >> 33
+    h = (h * 0xc4ceb9fe1a85ec53) & _MASK_64
+    return h ^ (h >> 33)
+
+
+class HyperLogLog(object):
+    """
+    Estimates the number of distinct elements added, with a relative standard error close to
+    error_rate, in 2 ** ceil(log2((1.04 / error_rate) ** 2)) bytes.
+    """
+
+    def __init__(self, error_rate=0.01):
+        self._precision = max(4, int(math.ceil(math.log((1.04 / error_rate) ** 2, 2))))
+        self._registers = bytearray(1 << self._precision)
+        self._value_bits = 64 - self._precision
+
+    def add(self, obj):
+        h = fingerprint(obj)
+        register = h >> self._value_bits
+        rank = self._value_bits - (h & ((1 << self._value_bits) - 1)).bit_length() + 1
+        if rank > self._registers[register]:
+            self._registers[register] = rank
+
+    def count(self):
+        m = len(self._registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self._registers)
+        zeros = self._registers.count(b'\x00')
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = m * math.log(float(m) / zeros)
+        return int(round(estimate))
+
+
+class BloomFilter(object):
+    """
+    Tells if an element might have been added before, with the given false positive rate as long
+    as no more than capacity elements are added.
+    """
+
+    def __init__(self, capacity, false_positive_rate=0.01):
+        capacity = max(1, capacity)
+        self._size = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) /
+                                          math.log(2) ** 2)))
+        self._hashes = max(1, int(round(float(self._size) / capacity * math.log(2))))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, obj):
+        """
+        Adds obj and returns True if it might have been added before.
+        """
+        return self._add_fingerprint(fingerprint(obj))
+
+    def _add_fingerprint(self, h):
+        h1, h2 = h & 0xffffffff, h >> 32
+        seen = True
+        for i in xrange(self._hashes):
+            bit = (h1 + i * h2) % self._size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._bits[byte] & mask:
+                seen = False
+                self._bits[byte] |= mask
+        return seen
+
+
+def duplicates(elements, false_positive_rate=0.01):
+    """
+    Returns a dict with the canonical form (see to_tuples) of the elements appearing more than
+    once in elements and their number of occurrences. elements is iterated twice: first through a
+    Bloom filter flagging duplicate candidates, then to count the candidates exactly, so memory
+    only grows with the number of candidates.
+    """
+    bloom = BloomFilter(len(elements), false_positive_rate)
+    candidates = set()
+    for element in elements:
+        canonical = to_tuples(element)
+        if bloom._add_fingerprint(_mix(hash(canonical))):
+            candidates.add(canonical)
+    counts = dict((candidate, 0) for candidate in candidates)
+    for element in elements:
+        canonical = to_tuples(element)
+        if canonical in counts:
+            counts[canonical] += 1
+    return dict((canonical, count) for canonical, count in counts.items() if count > 1)
@@ -0,0 +1,141 @@
+"""
+This module loads validations from declarative spec files (JSON, or YAML when PyYAML is installed),
+so they can be maintained without writing Python. A spec file looks like:
+
+    {"prefix": "users",
+     "validations": [{"every": "name", "is_not_none": []},
+                     {"every": "mails", "matches": ["[^@]+@[^@]+"]},
+                     {"at_least": 2, "path": "knows_python", "is_true": []},
+                     {"every": "age", "has": [18], "cmp": "gt"},
+                     {"select": "", "has_length": [3]}]}
+
+Every validation has one quantifier key (every, every_existent, one, some, no, select, or exactly,
+at_least and at_most whose value is the number of checks, the path then given by 'path'), one
+Selector method key whose value is the list of arguments, and optionally 'cmp', the name of a
+function in the operator module, and 'property', one of the names in PROPERTIES.
+"""
+
+import importlib
+import json
+import operator
+import os
+import types
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from conssert import Assertable, Selector
+
+
+QUANTIFIERS = ("every", "every_existent", "one", "some", "no", "select")
+
+COUNTED_QUANTIFIERS = ("exactly", "at_least", "at_most")
+
+PROPERTIES = {"len": len,
+              "sorted": sorted,
+              "keys": lambda x: x.keys(),
+              "values": lambda x: x.values()}
+
+_compiled = {}
+
+
+class Plan(object):
+    """
+    Validations of a spec file compiled into Assertable.verify_all specs.
+    """
+
+    def __init__(self, validations, prefix_path=[]):
+        self.validations = validations
+        self.prefix_path = prefix_path
+
+    def verify(self, data, raise_errors=True):
+        """
+        Verifies the validations against data; see Assertable.verify_all.
+        """
+        return Assertable(data, self.prefix_path).verify_all(self.validations, raise_errors)
+
+
+def load(spec_path):
+    """
+    Returns the Plan compiled from the spec file in spec_path, which is only parsed again when
+    the file is modified.
+    spec_path might also be a Python file or the name of a Python module defining 'validations',
+    a list of Assertable.verify_all specs, and optionally 'prefix', the path of the object tree
+    under test.
+    """
+    if not os.path.exists(spec_path):
+        return _module_plan(importlib.import_module(spec_path))
+
+    spec_path = os.path.abspath(spec_path)
+    mtime = os.path.getmtime(spec_path)
+    cached = _compiled.get(spec_path)
+    if cached is None or cached[0] != mtime:
+        if spec_path.endswith('.py'):
+            plan = _module_plan(_load_source(spec_path))
+        else:
+            plan = compile_spec(read(spec_path))
+        cached = (mtime, plan)
+        _compiled[spec_path] = cached
+    return cached[1]
+
+
+def _load_source(spec_path):
+    # the module is not registered in sys.modules, where its name could replace another module
+    module = types.ModuleType(os.path.splitext(os.path.basename(spec_path))[0])
+    module.__file__ = spec_path
+    with open(spec_path) as f:
+        exec compile(f.read(), spec_path, 'exec') in module.__dict__
+    return module
+
+
+def _module_plan(module):
+    prefix = getattr(module, "prefix", [])
+    return Plan(module.validations, prefix.split() if isinstance(prefix, basestring) else prefix)
+
+
+def read(path):
+    """
+    Returns the content of the JSON or YAML file in path.
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError("PyYAML is required to read {}".format(path))
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def compile_spec(spec):
+    """
+    Returns the Plan for the validations in the spec dict.
+    """
+    prefix = spec.get("prefix", [])
+    return Plan([_compile_validation(validation) for validation in spec.get("validations", [])],
+                prefix.split() if isinstance(prefix, basestring) else prefix)
+
+
+def _compile_validation(validation):
+    quantifiers = [key for key in validation if key in QUANTIFIERS + COUNTED_QUANTIFIERS]
+    checks = [key for key in validation if not key.startswith('_') and hasattr(Selector, key)]
+    if len(quantifiers) != 1 or len(checks) != 1:
+        raise ValueError("Validation {} must have one quantifier and one check".format(validation))
+
+    name, check = quantifiers[0], checks[0]
+    if name in COUNTED_QUANTIFIERS:
+        quantifier, path = (str(name), validation[name]), validation.get("path", [])
+    else:
+        quantifier, path = None if name == "select" else str(name), validation[name]
+
+    args = validation[check]
+    options = {}
+    if "cmp" in validation:
+        options["cmp"] = getattr(operator, validation["cmp"])
+    if "property" in validation:
+        options["property"] = PROPERTIES[validation["property"]]
+    return (quantifier,
+            path,
+            str(check),
+            args if isinstance(args, list) else [args],
+            options)
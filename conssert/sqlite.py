@@ -0,0 +1,358 @@
+"""
+This module provides an Assertable over records stored as JSON documents in a SQLite table, for
+datasets too big to keep in memory, and the bulk loaders storing them. SQLite must provide the
+JSON1 functions (built in since SQLite 3.38).
+A table stands for the list of its documents. Paths made of (key, value) and (key, operator,
+value) filters followed by keys are translated to SQL, so the database filters the documents and
+counts the values verifying is_, is_not, matches and has_length; only the locations of the first
+failing ones are fetched for the error reports. Filters only compare values of the same type
+(numbers with numbers and strings with strings). Any other path or validation loads the selected
+values, or the whole table, into memory.
+"""
+
+import itertools
+import json
+import operator
+import re
+import sqlite3
+import sys
+
+from conssert import Assertable, Selector, MAX_LOCATED_FAILURES
+from conssert.navigate import *
+
+
+# number of documents inserted at once by the loaders
+BATCH_SIZE = 10000
+
+_SQL_COMPARATORS = {operator.eq: '=',
+                    operator.ne: '!=',
+                    operator.lt: '<',
+                    operator.le: '<=',
+                    operator.gt: '>',
+                    operator.ge: '>='}
+
+_NUMBER_TYPES = "('integer', 'real', 'true', 'false')"
+
+_LENGTH_SQL = """CASE json_type(doc, ?)
+                 WHEN 'text' THEN length(json_extract(doc, ?))
+                 WHEN 'array' THEN json_array_length(doc, ?)
+                 WHEN 'object' THEN (SELECT count(*) FROM json_each(doc, ?)) END"""
+
+
+def load(records, path=":memory:", table="records"):
+    """
+    Stores records (an iterable of objects, normalized by to_dict) as JSON documents in table,
+    created in the SQLite database in path, and returns the connection to it.
+    The documents are inserted in batches within a single transaction.
+    """
+    return _store((json.dumps(to_dict(record)) for record in records), path, table, "?")
+
+
+def load_jsonl(lines, path=":memory:", table="records"):
+    """
+    Same as load for a JSON Lines file name, or iterable of lines. The lines are stored as they
+    are once validated by SQLite, without decoding them in Python.
+    """
+    if is_str(lines):
+        with open(lines) as f:
+            return load_jsonl(f, path, table)
+    return _store((line for line in lines if line.strip()), path, table, "json(?)")
+
+
+def _store(documents, path, table, value_sql):
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE {} (id INTEGER PRIMARY KEY, doc TEXT NOT NULL)"
+                           .format(_quote(table)))
+        insert = "INSERT INTO {} (doc) VALUES ({})".format(_quote(table), value_sql)
+        while True:
+            batch = [(document,) for document in itertools.islice(documents, BATCH_SIZE)]
+            if not batch:
+                break
+            connection.executemany(insert, batch)
+    return connection
+
+
+class SQLiteAssertable(Assertable):
+    """
+    Assertable over the JSON documents stored in a SQLite table (see load), standing for the
+    list of the documents in insertion order.
+    """
+
+    def __init__(self, connection, table="records", prefix_path=[]):
+        """
+        Args:
+            connection (sqlite3.Connection, str): connection to, or path of, the database.
+            table (str): name of the table, with the documents in its 'doc' column.
+            prefix_path (str, list): path of the object tree under test.
+        """
+        super(SQLiteAssertable, self).__init__(None, prefix_path, normalize=False)
+        self._connection = sqlite3.connect(connection) if is_str(connection) else connection
+        self._connection.create_function("conssert_search", 2, _search)
+        self._table = _quote(table)
+
+    @property
+    def _data(self):
+        # the documents are only loaded for the paths and validations that can't run in SQL
+        if self._documents is None:
+            self._documents = [json.loads(doc) for (doc,) in self._connection.execute(
+                "SELECT doc FROM {} ORDER BY id".format(self._table))]
+        return self._documents
+
+    @_data.setter
+    def _data(self, documents):
+        self._documents = documents
+
+    def _build_selector(self, path,
+                        min_checks=0,
+                        max_checks=sys.maxint,
+                        force_path_present=False,
+                        wrap=False,
+                        sampling=None):
+        full_path = self._prefix_path + path
+        query = None if wrap or sampling else self._query(full_path, force_path_present)
+        if query is None:
+            return super(SQLiteAssertable, self)._build_selector(path, min_checks, max_checks,
+                                                                 force_path_present, wrap,
+                                                                 sampling)
+        return SQLiteSelector(query,
+                              path=full_path,
+                              min_checks=query.count() if min_checks is None else min_checks,
+                              max_checks=max_checks)
+
+    def _query(self, path, force_path_present):
+        """
+        Returns the _Query selecting the values in path, or None if it can't be translated.
+        """
+        filters = list(itertools.takewhile(is_tuple, path))
+        keys = path[len(filters):]
+        if not keys or not all(_is_plain_key(key) for key in keys):
+            return None
+
+        query = _Query(self._connection, self._table, keys)
+        for node in filters:
+            attr = node[0]
+            if len(node) == 2 and query.exists("json_type(doc, ?) IS NULL", [_json_path([attr])]):
+                # (key, value) filters fail on documents without key
+                return None
+            condition = _filter_sql(node)
+            if condition is None:
+                return None
+            query = query.where(*condition)
+
+        # lists under the keys would be flattened by the selection
+        for end in range(1, len(keys)):
+            if query.exists("json_type(doc, ?) = 'array'", [_json_path(keys[:end])]):
+                return None
+
+        if force_path_present:
+            missing = query.first_document("json_type(doc, ?) IS NULL", [query.json_path])
+            if missing is not None:
+                raise AssertionError("Attribute {} not found in path {}".format(
+                    _missing_key(json.loads(missing), keys), path))
+            return query
+        return query.where("json_type(doc, ?) IS NOT NULL", [query.json_path])
+
+
+class SQLiteSelector(Selector):
+    """
+    Selector over the values of a path in a SQLite table, counting the ones verifying is_, is_not,
+    matches and has_length in SQL. Any other validation runs on the list of the selected values.
+    """
+
+    def __init__(self, query, path, min_checks, max_checks):
+        super(SQLiteSelector, self).__init__(None, path, min_checks, max_checks)
+        self._query = query
+        self._log_selection = query
+
+    @property
+    def _selection(self):
+        if self._values is None:
+            self._values = self._query.values()
+        return self._values
+
+    @_selection.setter
+    def _selection(self, values):
+        self._values = values
+
+    def is_(self, *content):
+        for item in content:
+            condition = _equals_sql(self._query.json_path, item)
+            if condition is None:
+                super(SQLiteSelector, self).is_(item)
+            else:
+                self._verify(item, *condition)
+
+    def is_not(self, *content):
+        for item in content:
+            condition = _equals_sql(self._query.json_path, item)
+            if condition is None:
+                super(SQLiteSelector, self).is_not(item)
+            else:
+                self._verify(item, "NOT ({})".format(condition[0]), condition[1])
+
+    def matches(self, *content):
+        json_path = self._query.json_path
+        for regex in content:
+            if self._query.exists("json_type(doc, ?) != 'text'", [json_path]):
+                # only strings are matched in SQL
+                super(SQLiteSelector, self).matches(regex)
+            else:
+                self._verify(regex, "conssert_search(?, json_extract(doc, ?))", [regex, json_path])
+
+    def has_length(self, content, **options):
+        comparator = _SQL_COMPARATORS.get(options.get("cmp", operator.eq))
+        params = [self._query.json_path] * 4
+        if comparator is None or not isinstance(content, (int, long)) or \
+                self._query.exists("({}) IS NULL".format(_LENGTH_SQL), params):
+            super(SQLiteSelector, self).has_length(content, **options)
+        else:
+            self._verify(content, "({}) {} ?".format(_LENGTH_SQL, comparator), params + [content])
+
+    def _verify(self, printable_obj, condition, params):
+        # conditions are made to never be NULL, so they can be negated
+        def locate(verifying):
+            negation = "" if verifying else "NOT "
+            return [(row_id - 1,) + tuple(self._query.keys) for row_id in
+                    self._query.ids(negation + "(" + condition + ")", params,
+                                    MAX_LOCATED_FAILURES)]
+
+        self._verify_count(printable_obj, self._query.count(condition, params), locate)
+
+
+class _Query(object):
+    """
+    Selection of the values under keys in the documents of table verifying some conditions.
+    """
+
+    def __init__(self, connection, table, keys, conditions=(), params=()):
+        self.keys = keys
+        self.json_path = _json_path(keys)
+        self._connection = connection
+        self._table = table
+        self._conditions = list(conditions)
+        self._params = list(params)
+
+    def where(self, condition, params):
+        return _Query(self._connection, self._table, self.keys,
+                      self._conditions + [condition], self._params + list(params))
+
+    def count(self, condition=None, params=()):
+        return self._run("count(*)", [], condition, params).fetchone()[0]
+
+    def exists(self, condition, params):
+        return self._run("1", [], condition, params, " LIMIT 1").fetchone() is not None
+
+    def first_document(self, condition, params):
+        row = self._run("doc", [], condition, params, " ORDER BY id LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def ids(self, condition, params, limit):
+        return [row_id for (row_id,) in
+                self._run("id", [], condition, params, " ORDER BY id LIMIT {}".format(limit))]
+
+    def values(self):
+        rows = self._run("json_type(doc, ?), json_extract(doc, ?)",
+                         [self.json_path, self.json_path], None, [], " ORDER BY id")
+        return [_decode(json_type, value) for json_type, value in rows]
+
+    def _run(self, select, select_params, condition, params, suffix=""):
+        conditions = self._conditions + ([condition] if condition is not None else [])
+        sql = "SELECT {} FROM {} WHERE {}{}".format(
+            select, self._table, " AND ".join("(" + sql + ")" for sql in conditions) or "1",
+            suffix)
+        return self._connection.execute(sql, list(select_params) + self._params + list(params))
+
+    def __repr__(self):
+        return "<values of {} in {} documents of table {}>".format(
+            self.json_path, self.count(), self._table)
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _is_plain_key(key):
+    return is_str(key) and key not in ("*", "**") and not is_descendant_lookup(key) and \
+        '"' not in key
+
+
+def _json_path(keys):
+    return "$" + "".join('."{}"'.format(key) for key in keys)
+
+
+def _missing_key(document, keys):
+    for key in keys:
+        if not is_dict(document) or key not in document:
+            return key
+        document = document[key]
+
+
+def _search(pattern, value):
+    return value is not None and re.search(pattern, value) is not None
+
+
+def _decode(json_type, value):
+    if json_type in ('array', 'object'):
+        return json.loads(value)
+    elif json_type in ('true', 'false'):
+        return bool(value)
+    return value
+
+
+def _equals_sql(json_path, value):
+    """
+    Returns the SQL condition, and its params, telling if the value in json_path is equal to
+    value, or None if it can't be compared in SQL.
+    """
+    if value is None:
+        return "json_type(doc, ?) = 'null'", [json_path]
+    elif isinstance(value, (bool, int, long, float)):
+        return "json_type(doc, ?) IN {} AND json_extract(doc, ?) = ?".format(_NUMBER_TYPES), \
+            [json_path, json_path, value]
+    elif is_str(value):
+        return "json_type(doc, ?) = 'text' AND json_extract(doc, ?) = ?", \
+            [json_path, json_path, value]
+    return None
+
+
+def _filter_sql(node):
+    """
+    Returns the SQL condition, and its params, selecting the documents verifying the filter node
+    (see navigate.filter_nodes), or None if it can't be translated.
+    """
+    attr, op, value = node if len(node) == 3 else (node[0], '==', node[1])
+    json_path = _json_path([attr])
+    if not _is_plain_key(attr):
+        return None
+
+    elif op == 'present':
+        return "(json_type(doc, ?) IS NOT NULL) = ?", [json_path, bool(value)]
+
+    elif op == '~':
+        return "json_type(doc, ?) = 'text' AND conssert_search(?, json_extract(doc, ?))", \
+            [json_path, value, json_path]
+
+    elif op in ('==', '!=', 'in', 'not in'):
+        values = value if op in ('in', 'not in') else [value]
+        if op in ('in', 'not in') and not is_collection(value):
+            return None
+        equals = [_equals_sql(json_path, item) for item in values]
+        if any(condition is None for condition in equals):
+            return None
+        sql = " OR ".join("(" + condition + ")" for condition, _ in equals) or "0"
+        params = [param for _, condition_params in equals for param in condition_params]
+        if op in ('==', 'in'):
+            return sql, params
+        return "json_type(doc, ?) IS NOT NULL AND NOT ({})".format(sql), [json_path] + params
+
+    elif op in ('<', '<=', '>', '>='):
+        if isinstance(value, (bool, int, long, float)):
+            types = _NUMBER_TYPES
+        elif is_str(value):
+            types = "('text')"
+        else:
+            return None
+        return "json_type(doc, ?) IN {} AND json_extract(doc, ?) {} ?".format(types, op), \
+            [json_path, json_path, value]
+    return None
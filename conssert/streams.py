@@ -0,0 +1,346 @@
+"""
+This module reads records one by one from JSON Lines, MessagePack and CBOR files, optionally
+compressed with gzip, bz2 or zstd (msgpack, cbor2 and zstandard are only required for their
+formats), and verifies validations over such streams of records in bounded memory.
+Files are read and decompressed in large blocks, and the records are decoded from the blocks
+as they arrive, without ever holding the whole decompressed file.
+"""
+
+import bz2
+import itertools
+import json
+import os
+import sys
+import zlib
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from conssert import Assertable, Selector
+from conssert.navigate import *
+
+
+# number of bytes read from the file, and decompressed, at once
+BUFFER_SIZE = 1 << 20
+
+_FORMATS = {'jsonl': 'jsonl', 'ndjson': 'jsonl',
+            'msgpack': 'msgpack', 'mpk': 'msgpack',
+            'cbor': 'cbor'}
+
+_COMPRESSIONS = {'gz': 'gzip', 'gzip': 'gzip',
+                 'bz2': 'bz2',
+                 'zst': 'zstd', 'zstd': 'zstd'}
+
+# quantifiers that hold for the stream if they hold for every chunk of it
+_PER_CHUNK = ('every', 'every_existent', 'no')
+
+# checks on the whole selection at once, that can't be verified chunk by chunk
+_WHOLE_SELECTION = ('has_no_duplicates', 'approx_distinct_count', 'distinct_count',
+                    'is_unique_by', 'group_sizes_are')
+
+
+def read_records(source, format=None, compression=None, buffer_size=BUFFER_SIZE):
+    """
+    Yields the records in source, a file name or a binary file object, one by one.
+    format ('jsonl', 'msgpack' or 'cbor') and compression ('gzip', 'bz2', 'zstd' or None) are
+    guessed from the extensions of the file name when not given, e.g: 'payloads.jsonl.gz'.
+    The records can be verified with StreamAssertable, or stored with conssert.sqlite.load.
+    """
+    if is_str(source):
+        extensions = os.path.basename(source).lower().split('.')[1:]
+        if compression is None and extensions and extensions[-1] in _COMPRESSIONS:
+            compression = _COMPRESSIONS[extensions.pop()]
+        if format is None and extensions:
+            format = _FORMATS.get(extensions[-1])
+        with open(source, 'rb') as f:
+            for record in read_records(f, format, compression, buffer_size):
+                yield record
+        return
+
+    if format not in _DECODERS:
+        raise ValueError("Unknown format {}, expected one of {}".format(format, sorted(_DECODERS)))
+    if compression not in _DECOMPRESSORS:
+        raise ValueError("Unknown compression {}, expected one of {}".format(
+            compression, sorted(_DECOMPRESSORS)))
+    for record in _DECODERS[format](_DECOMPRESSORS[compression](source, buffer_size)):
+        yield record
+
+
+def _blocks(f, buffer_size):
+    return iter(lambda: f.read(buffer_size), b'')
+
+
+def _reused_blocks(f, buffer_size):
+    # the compressed blocks are read into a single buffer, so every block must be consumed (e.g:
+    # decompressed) before the next one is read
+    if not hasattr(f, 'readinto'):
+        for block in _blocks(f, buffer_size):
+            yield block
+        return
+    data = bytearray(buffer_size)
+    size = f.readinto(data)
+    while size:
+        yield buffer(data, 0, size)
+        size = f.readinto(data)
+
+
+def _gzip_blocks(f, buffer_size):
+    return _decompressed_blocks(f, buffer_size, lambda: zlib.decompressobj(16 + zlib.MAX_WBITS))
+
+
+def _bz2_blocks(f, buffer_size):
+    return _decompressed_blocks(f, buffer_size, bz2.BZ2Decompressor)
+
+
+def _decompressed_blocks(f, buffer_size, decompressor_fn):
+    # files made of several concatenated streams (e.g: appended to) are decompressed one after
+    # the other, with the bytes left by a finished stream starting the next one
+    decompressor = None
+    for block in _reused_blocks(f, buffer_size):
+        while block:
+            if decompressor is None:
+                decompressor = decompressor_fn()
+            try:
+                data = decompressor.decompress(block)
+            except EOFError:
+                # the previous stream ended exactly with the previous block, which the bz2
+                # decompressors of Python 2 (without eof) only tell this way: block starts the next
+                # stream
+                decompressor = None
+                continue
+            if data:
+                yield data
+            block = decompressor.unused_data
+            if block or getattr(decompressor, 'eof', False):
+                decompressor = None
+
+
+def _zstd_blocks(f, buffer_size):
+    if zstandard is None:
+        raise ImportError("zstandard is required to read zstd compressed files")
+    reader = zstandard.ZstdDecompressor().stream_reader(f, read_size=buffer_size,
+                                                        read_across_frames=True)
+    return _blocks(reader, buffer_size)
+
+
+def _jsonl_records(blocks):
+    # the pieces of a line spanning several blocks are joined once its end arrives
+    pending = []
+    for block in blocks:
+        if b'\n' not in block:
+            pending.append(block)
+            continue
+        lines = block.split(b'\n')
+        if pending:
+            pending.append(lines[0])
+            lines[0] = b''.join(pending)
+        pending = [lines.pop()]
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    rest = b''.join(pending)
+    if rest.strip():
+        yield json.loads(rest)
+
+
+def _msgpack_records(blocks):
+    if msgpack is None:
+        raise ImportError("msgpack is required to read MessagePack files")
+    unpacker = msgpack.Unpacker(raw=False)
+    for block in blocks:
+        unpacker.feed(block)
+        for record in unpacker:
+            yield record
+
+
+def _cbor_records(blocks):
+    if cbor2 is None:
+        raise ImportError("cbor2 is required to read CBOR files")
+    reader = _BlockReader(blocks)
+    decoder = cbor2.CBORDecoder(reader)
+    while not reader.at_end():
+        yield decoder.decode()
+
+
+class _BlockReader(object):
+    """
+    File-like object reading the bytes in an iterable of blocks.
+    """
+
+    def __init__(self, blocks):
+        self._blocks = iter(blocks)
+        self._buffer = b''
+        self._position = 0
+
+    def read(self, size):
+        while len(self._buffer) - self._position < size and self._fill():
+            pass
+        data = self._buffer[self._position:self._position + size]
+        self._position += len(data)
+        return data
+
+    def at_end(self):
+        return self._position == len(self._buffer) and not self._fill()
+
+    def _fill(self):
+        block = next(self._blocks, b'')
+        if not block:
+            return False
+        self._buffer = self._buffer[self._position:] + block
+        self._position = 0
+        return True
+
+
+_DECOMPRESSORS = {None: _blocks, 'gzip': _gzip_blocks, 'bz2': _bz2_blocks, 'zstd': _zstd_blocks}
+
+_DECODERS = {'jsonl': _jsonl_records, 'msgpack': _msgpack_records, 'cbor': _cbor_records}
+
+
+def _mean_of(parts):
+    total, count = [sum(part) for part in zip(*parts)]
+    return float(total) / count
+
+
+# aggregate checks, with the function returning the partial results of a chunk, and the
+# aggregate of the partial results of all the chunks
+_AGGREGATES = {'sum_is': ("sum", lambda values: [sum(values)], sum),
+               'min_is': ("min", lambda values: [min(values)] if values else [], min),
+               'max_is': ("max", lambda values: [max(values)] if values else [], max),
+               'count_where': ("count", None, sum),
+               'mean_between': ("mean",
+                                lambda values: [(sum(values), len(values))] if values else [],
+                                _mean_of)}
+
+# aggregate checks failing on empty selections
+_NEED_ELEMENTS = ('min_is', 'max_is', 'mean_between')
+
+
+def _is_existential(spec):
+    return spec[0] == 'some' and spec[2] not in _AGGREGATES
+
+
+class StreamAssertable(object):
+    """
+    Verifies batches of validations over a stream of records (e.g: read_records), standing for
+    the list of the records, reading it once and keeping only chunk_size records in memory.
+    """
+
+    def __init__(self, records, prefix_path=[], chunk_size=1000):
+        """
+        Args:
+            records (iterable): records under test, e.g: read_records(path).
+            prefix_path (str, list): path of the object tree under test, in every chunk of records.
+            chunk_size (int): number of records verified at once.
+        """
+        self._records = iter(records)
+        self._prefix_path = prefix_path if is_list(prefix_path) else prefix_path.split()
+        self._chunk_size = chunk_size
+
+    def verify_all(self, specs, raise_errors=True):
+        """
+        Verifies a batch of validations as in Assertable.verify_all, reading the stream once.
+        'every', 'every_existent' and 'no' validations are verified on every chunk of records, and
+        'some' ones must hold on any of them; failures are reported with the range of records of
+        the first failing chunk, and the locations within it. Aggregate checks (sum_is, min_is,
+        max_is, mean_between and count_where) are verified with any quantifier, combining the
+        aggregates of the chunks. Any other validation can't be verified on a stream and raises
+        ValueError.
+        """
+        for spec in specs:
+            quantifier, check = spec[0], spec[2]
+            if check in _WHOLE_SELECTION or \
+                    check not in _AGGREGATES and quantifier not in _PER_CHUNK + ('some',):
+                raise ValueError("Validation {} can't be verified on a stream".format(spec[:3]))
+
+        results = [None] * len(specs)
+        # validations still to verify on the next chunks
+        pending = [True] * len(specs)
+        partials = [[] for _ in specs]
+        start = 0
+        for chunk in self._chunks():
+            assertable = Assertable(chunk, self._prefix_path)
+            for index, spec in enumerate(specs):
+                if pending[index]:
+                    error = self._verify_chunk(assertable, spec, partials[index], start, len(chunk))
+                    if _is_existential(spec):
+                        pending[index] = error is not None
+                    elif error is not None:
+                        results[index], pending[index] = error, False
+            start += len(chunk)
+
+        for index, spec in enumerate(specs):
+            if spec[2] in _AGGREGATES and pending[index]:
+                results[index] = self._verify_aggregate(spec, partials[index], start)
+            elif _is_existential(spec) and pending[index]:
+                results[index] = AssertionError("not verified by any of the {} records".format(
+                    start))
+
+        failures = ["Validation {} {} failed: {}".format(index, specs[index][:3], error)
+                    for index, error in enumerate(results) if error is not None]
+        if raise_errors and failures:
+            raise AssertionError("\n".join(failures))
+        return results
+
+    def _chunks(self):
+        # an empty stream is verified as an empty list of records
+        chunk = list(itertools.islice(self._records, self._chunk_size))
+        yield chunk
+        while len(chunk) == self._chunk_size:
+            chunk = list(itertools.islice(self._records, self._chunk_size))
+            if chunk:
+                yield chunk
+
+    @staticmethod
+    def _verify_chunk(assertable, spec, partials, start, size):
+        quantifier, path, check, args = spec[:4]
+        options = spec[4] if len(spec) > 4 else {}
+        try:
+            selector = assertable._quantified(quantifier, path)
+            if check in _AGGREGATES:
+                partials.extend(StreamAssertable._partial(selector, check, args, options))
+            else:
+                getattr(selector, check)(*args, **options)
+        except AssertionError as error:
+            return AssertionError("in records {} to {}: {}".format(
+                start, start + size - 1, error))
+
+    @staticmethod
+    def _partial(selector, check, args, options):
+        property_fn = options.get("property")
+        values = [property_fn(value) for value in selector._elements] if property_fn \
+            else selector._elements
+        if check == 'count_where':
+            return [sum(1 for value in values if args[0](value))]
+        return _AGGREGATES[check][1](values)
+
+    def _verify_aggregate(self, spec, partials, size):
+        quantifier, path, check, args = spec[:4]
+        options = dict(spec[4] if len(spec) > 4 else {})
+        options.pop("property", None)
+        expected = args[-1]
+        if check == 'mean_between':
+            expected = tuple(args)
+            options["cmp"] = lambda mean, bounds: bounds[0] <= mean <= bounds[1]
+        name, _, aggregate_fn = _AGGREGATES[check]
+        selector = Selector(selection=partials,
+                            path=self._prefix_path + split_and_reduce([path]),
+                            min_checks=0,
+                            max_checks=sys.maxint)
+        selector._log_selection = "<{} of {} streamed records>".format(name, size)
+        try:
+            selector._aggregate(name, aggregate_fn, expected, options,
+                                needs_elements=check in _NEED_ELEMENTS)
+        except AssertionError as error:
+            return error
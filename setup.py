@@ -12,6 +12,7 @@ setup(
     author_email="juan.afernandez@ymail.com",
     platforms=["any"],
     packages=find_packages(exclude="tests"),
+    entry_points={"console_scripts": ["conssert = conssert.__main__:main"]},
     keywords=["validation", "test", "unit test", "content assertion"],
     classifiers=[
         "Development Status :: 4 - Beta",
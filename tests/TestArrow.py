@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, skipIf
+from conssert import Assertable
+
+try:
+    import pandas
+    import pyarrow
+    import pyarrow.parquet as parquet
+    from conssert.frames import FrameSelector
+except ImportError:
+    pyarrow = None
+
+
+@skipIf(pyarrow is None, "pyarrow is not installed")
+class TestArrow(TestCase):
+
+    def setUp(self):
+        frame = pandas.DataFrame({"id": range(100),
+                                  "mail": ["user{}@x.com".format(i) for i in range(100)],
+                                  "tags": [["a"] * (i % 3) for i in range(100)]})
+        self.table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "users.parquet")
+        parquet.write_table(self.table, self.path, row_group_size=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_arrow_table(self):
+        with Assertable.from_arrow(self.table) as in_table:
+            self.assertIsInstance(in_table.every("mail"), FrameSelector)
+            in_table.every("mail").matches("^user[0-9]+@x.com$")
+            in_table.every([("id", "<", 10), "mail"]).has_length(11)
+            in_table.exactly(34, "tags").has_length(0)
+            in_table.every("tags").has_length(2, cmp=lambda length, limit: length <= limit)
+            in_table.one([("id", 43), "tags"]).is_(["a"])
+            in_table.every("id").has_no_duplicates()
+            self.assertRaises(AssertionError, in_table.every("mail").has_length, 11)
+            self.assertEqual(sorted(in_table._projections), [(("id",), None),
+                                                             (("id", "mail"), None),
+                                                             (("id", "tags"), None),
+                                                             (("mail",), None),
+                                                             (("tags",), None)])
+
+    def test_parquet_file(self):
+        with Assertable.from_parquet(self.path) as in_file:
+            in_file.every([("id", ">=", 95), "mail"]).matches("^user9[5-9]@")
+            in_file.no([("id", "in", [5, 55]), "mail"]).is_("user6@x.com")
+            in_file.no([("id", ">", 100), "mail"]).is_not_none()
+            in_file.some("**").is_("a")
+            try:
+                in_file.every([("id", ">", 40), ("id", "<", 60), "id"]).is_(41)
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("(42, 'id')", str(error))
+                self.assertNotIn("(41, 'id')", str(error))
+            self.assertEqual(sorted(in_file._projections), [(("id",), (4, 5)),
+                                                            (("id", "mail"), ()),
+                                                            (("id", "mail"), (0, 5)),
+                                                            (("id", "mail"), (9,))])
@@ -0,0 +1,67 @@
+import operator
+from unittest import TestCase
+from conssert import Assertable
+from conssert import codegen
+
+
+class TestCodegen(TestCase):
+
+    albums = [{"band": "Pink Floyd", "year": 1979, "title": "The Wall", "genres": ["Rock"],
+               "label": {"name": "Harvest", "country": "UK"}},
+              {"band": "Led Zeppelin", "year": 1969, "title": "II", "genres": ["Rock", "Blues"],
+               "label": {"name": "Atlantic", "country": "US"}},
+              {"band": "The Doors", "year": 1967, "title": "The Doors", "genres": [],
+               "label": {"name": "Elektra"}, "live": False},
+              {"band": "Pink Floyd", "year": 1973, "title": None, "genres": ["Prog"],
+               "label": {"name": "Harvest", "country": "UK"}, "live": True}]
+
+    validations = [("every", "year", "has", [1960], {"cmp": operator.gt}),
+                   ("every", "year", "is_", [1979]),
+                   ("every_existent", "live", "is_not", [None]),
+                   ("some", "live", "is_true", []),
+                   ("no", "band", "is_", ["Queen"]),
+                   ("no", "band", "is_", ["The Doors"]),
+                   (("exactly", 2), "band", "is_", ["Pink Floyd"]),
+                   (("at_most", 1), "band", "is_", ["Pink Floyd"]),
+                   ("every", "band", "matches", ["^[A-Z]", "^The"]),
+                   ("every", "band", "has_length", [6], {"cmp": operator.gt}),
+                   ("every", "genres", "has", ["Rock"]),
+                   ("some", "genres", "has_some_of", [["Prog", "Jazz"]]),
+                   ("every", "genres", "is_", [["Rock", "Blues"]]),
+                   ("every", "genres", "has_not", ["Jazz"]),
+                   ("every", "label", "has_keys", ["name"]),
+                   ("every", "label", "keys_are", [["name", "country"]]),
+                   ("every", [], "has", [{"label": {"name": "Harvest"}, "year": 1979}]),
+                   ("some", [], "has", [{"label": {"name": "Harvest"}, "year": 1979}]),
+                   (("exactly", 3), [], "has_some_of", [{"label": {"country": "UK"}, "live": False}]),
+                   ("every", [], "has_not", [{"label": {"country": "FR"}}]),
+                   ("every", "title", "is_not", ["IV", None]),
+                   ("every", "title", "evals_true", []),
+                   (None, "year", "has_length", [4])]
+
+    def test_same_results_as_interpreter(self):
+        expected = Assertable(self.albums).verify_all(self.validations, raise_errors=False)
+        results = Assertable(self.albums, codegen=True).verify_all(self.validations,
+                                                                    raise_errors=False)
+        self.assertEqual([str(error) for error in results], [str(error) for error in expected])
+        self.assertEqual([error is None for error in results],
+                         [True, False, True, True, True, False, True, False, False, True, False,
+                          True, False, True, True, False, False, True, True, True, False, False,
+                          True])
+
+    def test_plans(self):
+        with Assertable(self.albums, codegen=True) as in_albums:
+            in_albums.every().has({"label": {"name": "Capitol"}, "year": 1900}, cmp=operator.ne)
+            plans = len(codegen._factories)
+            in_albums.every().has({"label": {"name": "Columbia"}, "year": 2000}, cmp=operator.ne)
+            self.assertRaises(AssertionError, in_albums.every().has,
+                              {"label": {"name": "Harvest"}, "year": 1900}, cmp=operator.ne)
+            self.assertEqual(len(codegen._factories), plans)
+            in_albums.every().has({"label": {"catalog": "SHVL 804"}}, cmp=operator.ne)
+            self.assertEqual(len(codegen._factories), plans + 1)
+
+        source = codegen.source({"year": 1979, "label": {"name": "Harvest"}}, operator.eq)
+        self.assertIn("element.get('year')", source)
+        self.assertIn("_walk(element, ('label', 'name'))", source)
+        self.assertNotIn("_default_comparator(element)", source)
+        self.assertIsNone(codegen.source({("year", "month"): 1}))
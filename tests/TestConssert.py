@@ -722,4 +722,149 @@ class TestConssert(TestCase):
                                        cmp=operator.eq,
                                        property=lambda (pt1, pt2): map(operator.add, pt1, pt2))
             in_segment.exactly(2, '**').is_(3)
-            in_segment.one('bounds y').has_some_of([0, 8])
\ No newline at end of file
+            in_segment.one('bounds y').has_some_of([0, 8])
+
+    def test_contains_snapshot(self):
+        with Assertable(self.rock_bands) as in_rock_bands:
+            in_rock_bands().contains_snapshot([{"band": "Pink Floyd",
+                                                "albums": [{"title": "The Wall", "year": 1979}]}],
+                                              key="title")
+            in_rock_bands.one().contains_snapshot({"members": ["Gilmour", "Waters"]})
+            in_rock_bands.no().contains_snapshot({"members": ["Gilmour", "Paice"]})
+            self.assertRaises(AssertionError, in_rock_bands().contains_snapshot,
+                              [{"albums": [{"title": "The Wall", "year": 1980}]}], key="title")
+
+        # the differences reported are those of the first element not containing the snapshot
+        with Assertable([{"id": 1, "tags": ["a"]}, {"id": 2, "tags": ["b"]}]) as in_records:
+            for selector in [in_records.every(), in_records.at_least(2)]:
+                try:
+                    selector.contains_snapshot({"tags": ["a"]})
+                    self.fail()
+                except AssertionError as error:
+                    self.assertIn("(['tags', 0], 'a', <missing>)", str(error))
+
+    def test_verify_all(self):
+        with Assertable(self.rock_bands) as in_rock_bands:
+            results = in_rock_bands.verify_all([
+                ('some', 'albums year', 'has', [1972]),
+                ('every', 'albums title', 'is_not_none', []),
+                (('at_least', 2), 'albums', 'has', [{"year": 1970}], {'cmp': operator.gt}),
+                (None, 'band', 'has', ['Cream'])])
+            self.assertEqual(results, [None] * 4)
+
+            results = in_rock_bands.verify_all([
+                ('no', 'albums year', 'has', [1972]),
+                ('one', 'members', 'has', ['Gilmour']),
+                ('every', 'albums year', 'has', [1900], {'cmp': operator.gt})],
+                raise_errors=False)
+            self.assertTrue(isinstance(results[0], AssertionError))
+            self.assertEqual(results[1], None)
+            self.assertTrue(isinstance(results[2], AssertionError))
+
+            self.assertRaises(AssertionError, in_rock_bands.verify_all,
+                              [('one', 'members', 'has', ['Gilmour']),
+                               ('some', 'band', 'is_', ['Queen'])])
+
+    def test_all_of(self):
+        checks = [('is_not_none', []),
+                  ('matches', ['^[A-Z]']),
+                  ('matches', ['^The']),
+                  ('has_length', [4], {'cmp': operator.gt}),
+                  ('has_length', [20], {'cmp': operator.lt}),
+                  ('is_not', ['Animals', 'Paranoid']),
+                  ('has_no_duplicates', []),
+                  ('is_', [['The Wall']]),
+                  ('has_some_of', [['Wall', 'Sabbath']], {'cmp': operator.contains}),
+                  ('contains_snapshot', ['The Wall'])]
+        with Assertable(self.rock_bands) as in_rock_bands:
+            for selector in (lambda: in_rock_bands.every("albums title"),
+                             lambda: in_rock_bands.some("albums title"),
+                             lambda: in_rock_bands.exactly(2, "albums title"),
+                             lambda: in_rock_bands.no("albums title"),
+                             lambda: in_rock_bands("band"),
+                             lambda: in_rock_bands.every([("band", "Queen"), "band"])):
+                expected = []
+                for spec in checks:
+                    try:
+                        getattr(selector(), spec[0])(*spec[1], **(spec[2] if len(spec) > 2 else {}))
+                        expected.append(True)
+                    except AssertionError:
+                        expected.append(False)
+                results = selector().all_of(checks, raise_errors=False)
+                self.assertEqual([error is None for error in results], expected)
+
+            try:
+                in_rock_bands.every_existent("albums year").all_of(
+                    [('has', [1970], {'cmp': operator.gt}), ('is_not', [1979])])
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("Check 0 has failed", str(error))
+                self.assertIn("(0, 'albums', 0, 'year')", str(error))
+                self.assertIn("Check 1 is_not failed", str(error))
+                self.assertIn("(0, 'albums', 1, 'year')", str(error))
+
+        lengths = []
+        counted_len = lambda value: lengths.append(value) or len(value)
+        with Assertable({"ids": ["a", "bb", "ccc"]}) as in_ids:
+            in_ids.every("ids").all_of([('has', [4], {'cmp': operator.lt, 'property': counted_len}),
+                                        ('has', [0], {'cmp': operator.gt, 'property': counted_len})])
+        self.assertEqual(lengths, ["a", "bb", "ccc"])
+
+    def test_sampling(self):
+        records = [{"id": i, "ok": i % 100 != 99} for i in range(5000)]
+        with Assertable(records) as in_records:
+            in_records.every("id", sample=300, seed=1).has(0, cmp=operator.ge)
+            in_records.every_existent("id", error_rate=0.02, seed=1).has(5000, cmp=operator.lt)
+            in_records.every("ok", sample=20, seed=2).is_true()
+            self.assertRaises(AssertionError, in_records.every("ok", sample=300, seed=2).is_true)
+            try:
+                in_records.every("id", sample=200, seed=3).has(2500, cmp=operator.lt)
+            except AssertionError as error:
+                self.assertTrue("200 elements sampled out of 5000" in str(error))
+            else:
+                self.fail("sampled validation did not fail")
+
+            # checks on the whole selection can't be verified on a sample
+            sampled = in_records.every("id", sample=10, seed=1)
+            self.assertRaises(ValueError, sampled.sum_is, sum(range(5000)))
+            self.assertRaises(ValueError, sampled.count_where, lambda i: i >= 0, 5000)
+            self.assertRaises(ValueError, sampled.distinct_count, 5000)
+            self.assertRaises(ValueError, sampled.has_no_duplicates)
+            self.assertRaises(ValueError, in_records.every(sample=10).is_unique_by, "id")
+            self.assertRaises(ValueError, in_records.every(sample=10).group_sizes_are, "ok", 1)
+            in_records.every("id").sum_is(sum(range(5000)))
+
+    def test_aggregates(self):
+        with Assertable(self.rock_bands) as in_rock_bands:
+            in_rock_bands.every_existent("albums year").max_is(2000, cmp=operator.lt)
+            in_rock_bands("albums year").min_is(1967)
+            in_rock_bands.every("members").sum_is(11, property=len)
+            in_rock_bands().count_where(lambda band: "Rock" in band["genre"], 3)
+            in_rock_bands.every_existent("albums year").mean_between(1960, 1980)
+            in_rock_bands.every("genre").distinct_count(3)
+            self.assertRaises(AssertionError, in_rock_bands.every_existent("albums year").max_is, 1900)
+            self.assertRaises(AssertionError, in_rock_bands.every_existent("albums year").mean_between,
+                              1980, 1990)
+            self.assertRaises(AssertionError, in_rock_bands.every_existent("missing").min_is, 0,
+                              cmp=operator.ge)
+
+        def checked_len(value):
+            if not value:
+                raise ValueError("empty value")
+            return len(value)
+
+        with Assertable({"names": ["a", ""]}) as in_names:
+            self.assertRaises(ValueError, in_names.every("names").sum_is, 1, property=checked_len)
+            in_names.every("names").sum_is(0, property=len, cmp=operator.gt)
+
+        with Assertable({"latencies": [10, 20.5, 40]}) as in_stats:
+            in_stats("latencies").sum_is(70.5)
+            in_stats("latencies").mean_between(23.5, 23.5)
+            in_stats("latencies").count_where(lambda x: x > 15, 2)
+
+    def test_big_selections(self):
+        with Assertable({"ids": range(50000)}) as in_ids:
+            in_ids.every("ids").has(0, cmp=operator.ge)
+            in_ids.one("ids").is_(49999)
+            in_ids.no("ids").is_(-1)
+            self.assertRaises(AssertionError, in_ids.every("ids").is_not, 25000)
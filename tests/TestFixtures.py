@@ -0,0 +1,47 @@
+import shutil
+import tempfile
+from unittest import TestCase
+from conssert.fixtures import FixtureRegistry, digest
+
+
+class TestFixtures(TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.bands = [{"band": "Deep Purple", "members": ["Gillan", "Blackmore", "Paice"]},
+                      {"band": "Led Zeppelin", "members": ["Plant", "Page", "Bonham"]}]
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_cached_by_content(self):
+        registry = FixtureRegistry()
+        normalized = registry.normalize(self.bands)
+        self.assertIs(registry.normalize([dict(band) for band in self.bands]), normalized)
+        with registry.assertable(self.bands) as in_bands:
+            in_bands.one("members").has("Paice")
+
+        self.bands[0]["band"] = "Rainbow"
+        self.assertIsNot(registry.normalize(self.bands), normalized)
+
+    def test_cached_by_key(self):
+        registry = FixtureRegistry()
+        normalized = registry.normalize(self.bands, key="bands")
+        self.assertIs(registry.normalize(None, key="bands"), normalized)
+
+    def test_unpicklable_objects_are_not_cached(self):
+        class Local:
+            pass
+
+        local = Local()
+        local.x = 1
+        registry = FixtureRegistry()
+        self.assertEqual(digest(local), None)
+        self.assertEqual(registry.normalize(local), {"x": 1})
+        with registry.assertable(local) as in_local:
+            in_local.one("x").is_(1)
+
+    def test_disk_cache_shared_between_registries(self):
+        FixtureRegistry(self.cache_dir).normalize(self.bands, key="bands")
+        with FixtureRegistry(self.cache_dir).assertable(None, "members", key="bands") as members:
+            members.one().has("Plant")
@@ -0,0 +1,106 @@
+import operator
+from unittest import TestCase, skipIf
+from conssert import Assertable
+from conssert.navigate import to_dict
+
+try:
+    import numpy
+    import pandas
+    from conssert.frames import FrameSelector
+except ImportError:
+    pandas = None
+
+
+@skipIf(pandas is None, "pandas is not installed")
+class TestFrames(TestCase):
+
+    records = [{"band": "Pink Floyd", "year": 1979, "title": "The Wall", "genres": ["Rock"]},
+               {"band": "Led Zeppelin", "year": 1969, "title": "II", "genres": ["Rock", "Blues"]},
+               {"band": "The Doors", "year": 1967, "title": "The Doors", "genres": []},
+               {"band": "Pink Floyd", "year": 1973, "title": None, "genres": ["Prog"]}]
+
+    validations = [("every", "year", "is_not", [None]),
+                   ("every", "year", "is_", [1979]),
+                   ("every", "title", "is_not", [None]),
+                   ("every_existent", "title", "is_not", [None]),
+                   ("some", "title", "is_none", []),
+                   ("no", "title", "is_none", []),
+                   ("some", "title", "matches", ["Wall$"]),
+                   ("no", "band", "is_", ["Queen"]),
+                   ("no", "band", "is_", ["The Doors"]),
+                   (("exactly", 2), "band", "is_", ["Pink Floyd"]),
+                   (("at_most", 1), "band", "is_", ["Pink Floyd"]),
+                   ("every", "band", "has_length", [6], {"cmp": operator.gt}),
+                   ("every", "band", "has_length", [10], {"cmp": operator.ge}),
+                   ("every", "genres", "has_length", [2], {"cmp": operator.le}),
+                   ("one", "genres", "has_length", [0]),
+                   ("every", "genres", "is_", [["Rock"]]),
+                   ("every", [("year", ">", 1970), "band"], "is_", ["Pink Floyd"]),
+                   ("every", [("year", "<", 1970), "band"], "is_", ["Pink Floyd"]),
+                   ("one", [("band", "Pink Floyd"), "title"], "is_", ["The Wall"]),
+                   ("every_existent", [("band", "in", ["The Doors"]), "year"], "is_", [1967]),
+                   ("every", [("title", "present", False), "year"], "is_", [1973]),
+                   ("every", [("title", "!=", "II"), "year"], "is_not", [1969]),
+                   ("every", [("band", "!=", "The Doors"), "title"], "is_not", ["II"]),
+                   ("every", [("year", "<", "1970"), "band"], "is_not", ["Queen"]),
+                   ("every", [("year", "==", "1969"), "band"], "is_", ["Queen"]),
+                   ("every", "year", "has", [1960], {"cmp": operator.gt}),
+                   ("every", "**", "is_not_none", []),
+                   ("every", "genres", "has_no_duplicates", []),
+                   (None, "year", "has_length", [4])]
+
+    def test_same_results_as_records(self):
+        frame = pandas.DataFrame(self.records)
+        expected = Assertable(self.records).verify_all(self.validations, raise_errors=False)
+        results = Assertable.from_frame(frame).verify_all(self.validations, raise_errors=False)
+        self.assertEqual([error is None for error in results],
+                         [error is None for error in expected])
+        self.assertEqual([error is None for error in results],
+                         [True, False, False, False, True, False, True, True, False, True, False,
+                          True, False, True, True, False, True, False, True, True, True, True,
+                          False, True, True, True, False, True, True])
+
+    def test_null_cells(self):
+        frame = pandas.DataFrame({"email": ["a@x", None, "c@x"], "id": [1, 2, 3]})
+        with Assertable.from_frame(frame) as in_frame:
+            self.assertIsInstance(in_frame.some("email"), FrameSelector)
+            in_frame.some("email").is_none()
+            in_frame.one("email").is_none()
+            in_frame("email").has(None)
+            in_frame.one([("id", ">", 1), "email"]).is_("c@x")
+            self.assertRaises(AssertionError, in_frame.no("email").is_none)
+            self.assertRaises(AssertionError, in_frame.every_existent("email").is_not_none)
+            self.assertRaises(AssertionError, in_frame.every([("id", "<", 3), "email"]).is_not_none)
+
+    def test_vectorized_selections(self):
+        frame = pandas.DataFrame(self.records, index=list("abcd"))
+        with Assertable.from_frame(frame) as in_frame:
+            self.assertIsInstance(in_frame.every("title"), FrameSelector)
+            self.assertIsInstance(in_frame.every([("year", ">", 1970), "title"]), FrameSelector)
+            self.assertNotIsInstance(in_frame.every("**"), FrameSelector)
+            self.assertNotIsInstance(in_frame.every([("year", "<", "1970"), "title"]),
+                                     FrameSelector)
+            self.assertNotIsInstance(in_frame("title"), FrameSelector)
+            try:
+                in_frame.every("year").is_(1979)
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("expected = 4, got = 1", str(error))
+                self.assertIn("('d', 'year')", str(error))
+
+    def test_series(self):
+        with Assertable.from_frame(pandas.Series(["a@x.com", "b@x.com"])) as in_mails:
+            self.assertIsInstance(in_mails.every(), FrameSelector)
+            in_mails.every().matches("^[^@]+@[^@]+$")
+            in_mails.every().has_no_duplicates()
+            self.assertRaises(AssertionError, in_mails.some().is_, "c@x.com")
+
+    def test_numpy_values(self):
+        frame = pandas.DataFrame({"id": [1, 2], "scores": [numpy.array([1, 2]), numpy.array([3])]})
+        self.assertEqual(to_dict(frame), [{"id": 1, "scores": [1, 2]}, {"id": 2, "scores": [3]}])
+        self.assertIs(type(to_dict(frame)[0]["id"]), int)
+        with Assertable.from_frame(frame) as in_frame:
+            in_frame.one("scores").is_([1, 2])
+            in_frame.every("id").has_no_duplicates()
+        # numpy values are only converted in frames
+        self.assertIs(type(to_dict({"a": numpy.int64(3)})["a"]), numpy.int64)
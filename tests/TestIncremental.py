@@ -0,0 +1,83 @@
+from unittest import TestCase
+import operator
+from conssert.incremental import IncrementalAssertable
+
+
+class TestIncremental(TestCase):
+
+    def setUp(self):
+        self.state = {"users": [{"name": "Alice", "age": 31},
+                                {"name": "Bob", "age": 42}],
+                      "counters": {"requests": 10, "errors": 0}}
+
+    def test_refresh_with_changed_keys(self):
+        calls = []
+
+        def older_than(age, limit):
+            calls.append(age)
+            return age > limit
+
+        with IncrementalAssertable(self.state) as watched:
+            watched.invariant('every', 'users age', 'has', 18, cmp=older_than)
+            watched.invariant('one', 'counters errors', 'is_', 0)
+            self.assertEqual(len(calls), 2)
+
+            self.state["counters"]["requests"] = 20
+            watched.refresh("counters")
+            self.assertEqual(len(calls), 2)
+
+            self.state["users"].append({"name": "Carol", "age": 12})
+            self.assertRaises(AssertionError, watched.refresh, "users")
+            self.assertEqual(calls[2:], [12])
+
+            self.state["users"][2]["age"] = 21
+            watched.refresh("users")
+
+            self.state["counters"]["errors"] = 1
+            self.assertRaises(AssertionError, watched.refresh, "counters")
+
+    def test_refresh_diffs_snapshots(self):
+        calls = []
+
+        def same_name(user, name):
+            calls.append(user["name"])
+            return user["name"] == name
+
+        with IncrementalAssertable(self.state, 'users') as watched:
+            watched.invariant('one', [], 'has', 'Bob', cmp=same_name)
+            self.assertEqual(calls, ['Alice', 'Bob'])
+
+            self.state["users"][0]["age"] = 32
+            watched.refresh()
+            self.assertEqual(calls[2:], ['Alice'])
+
+            self.state["users"].append({"name": "Bob", "age": 9})
+            self.assertRaises(AssertionError, watched.refresh)
+
+    def test_list_root_and_quantifier_tuples(self):
+        numbers = [1, 2, 3]
+        with IncrementalAssertable(numbers) as watched:
+            watched.invariant(('at_least', 2), [], 'has', 1, cmp=operator.gt)
+            watched.invariant(None, [], 'has_length', 3)
+
+            numbers.append(4)
+            self.assertRaises(AssertionError, watched.refresh, 3)
+
+            numbers.pop()
+            numbers[0] = 0
+            watched.refresh(0)
+
+    def test_comparisons_with_the_same_input(self):
+        with IncrementalAssertable({"x": [3, 4]}) as watched:
+            self.assertRaises(AssertionError, watched.invariant, 'every', 'x', 'all_of',
+                              [('has', [5], {'cmp': operator.lt}),
+                               ('has', [5], {'cmp': operator.gt})])
+            watched.invariant('every', 'x', 'all_of', [('has', [5], {'cmp': operator.lt}),
+                                                      ('has', [2], {'cmp': operator.gt})])
+
+    def test_descendant_lookups(self):
+        with IncrementalAssertable(self.state) as watched:
+            watched.invariant('every', '..name', 'matches', '^[A-Z]')
+
+            self.state["users"].append({"name": "bad"})
+            self.assertRaises(AssertionError, watched.refresh, "users")
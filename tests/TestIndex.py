@@ -0,0 +1,96 @@
+from unittest import TestCase
+from conssert import Assertable, expand_last_level, find_key, filter_nodes, flatten
+from conssert.index import PathIndex, FilterIndex
+
+
+class TestIndex(TestCase):
+
+    def setUp(self):
+        self.tree = {"a": [1, {"b": 2, "c": [3, [4, 5]]}],
+                     "d": {"e": {"f": 6}, "g": []},
+                     "h": None}
+
+    def test_leaves(self):
+        index = PathIndex(self.tree)
+        for node in [self.tree, self.tree["a"], self.tree["a"][1], self.tree["d"],
+                     self.tree["d"]["g"], [self.tree["a"], self.tree["d"]], 7, None]:
+            self.assertEqual(index.leaves(node), expand_last_level(node))
+        self.assertEqual(index.leaves(flatten(self.tree["a"][1]["c"][1:])),
+                         expand_last_level(flatten(self.tree["a"][1]["c"][1:])))
+
+    def test_descendants(self):
+        tree = {"users": [{"name": "Alice", "email": "alice@gmail.com",
+                           "friends": [{"name": "Bob", "email": "bob@gmail.com"}]},
+                          {"name": "Mette", "contact": {"email": None}}],
+                "email": "admin@podio.com"}
+        index = PathIndex(tree)
+        for node in [tree, tree["users"], tree["users"][0], tree["users"][1], [tree["users"][1]]]:
+            self.assertEqual(index.descendants(node, "email"), find_key(node, "email"))
+        self.assertEqual(sorted(find_key(tree, "email")),
+                         [None, "admin@podio.com", "alice@gmail.com", "bob@gmail.com"])
+        self.assertEqual(index.descendants(tree["users"][0], "name"), ["Alice", "Bob"])
+        self.assertEqual(index.descendants(tree, "phone"), [])
+
+        with Assertable(tree) as in_tree:
+            in_tree("..email").has("admin@podio.com", None)
+            in_tree.exactly(2, "users ..name").is_not("Alice")
+            in_tree.every("users ..friends ..email").matches("@gmail")
+            in_tree.no("users ..email").is_("admin@podio.com")
+
+    def test_indexed_assertable(self):
+        with Assertable(self.tree, index=True) as in_tree:
+            in_tree("**").is_([1, 2, 3, 4, 5, 6, None])
+            in_tree.one("**").is_(6)
+            in_tree("a **").is_([1, 2, 3, 4, 5])
+            in_tree.every("d **").is_(6)
+            in_tree.no("d g **").is_(6)
+
+    def test_filter_index(self):
+        records = [{"year": 1970, "genre": "Hard Rock", "title": "In Rock"},
+                   {"year": 1967, "genre": "Psychedelic Rock"},
+                   {"year": 1979.5, "genre": "Progressive Rock", "title": "The Wall"},
+                   {"genre": "Blues Rock", "title": "Disraeli Gears"},
+                   {"year": 1967, "genre": "Blues Rock"},
+                   "not a record"]
+        filters = [("year", "==", 1967), ("year", "in", [1967, 1970]), ("year", "<", 1970),
+                   ("year", "<=", 1970), ("year", ">", 1967), ("year", ">=", 1979.5),
+                   ("year", ">", "1967"), ("genre", "<", "C"), ("genre", "in", "Blues Rock"),
+                   ("genre", "!=", "Blues Rock"), ("title", "~", "^The"), ("title", "present", 0)]
+        index = FilterIndex()
+        for _ in range(2):
+            for attr, op, value in filters:
+                self.assertEqual(index.filter(records, attr, op, value),
+                                 filter_nodes(records, attr, op, value))
+        self.assertRaises(ValueError, filter_nodes, records, "year", "=", 1967)
+
+    def test_filter_index_of_nested_lists(self):
+        with Assertable({"g": [{"n": 1, "r": [{"k": 1}, {"k": 2}]},
+                               {"n": 2, "r": [{"k": 1}]}]}) as in_groups:
+            for _ in range(200):
+                in_groups.every(["g", "r", ("k", "==", 1), "k"]).is_(1)
+            # the lists of the nested records are built again by every selection
+            self.assertEqual(len(in_groups._filter_index._seen), 0)
+            self.assertEqual(in_groups._filter_index._indexes, {})
+
+            for _ in range(2):
+                in_groups.every(["g", ("n", "==", 1), "n"]).is_(1)
+                in_groups.every(["g", ("n", ">", 1), "n"]).is_(2)
+            self.assertEqual(len(in_groups._filter_index._indexes), 1)
+
+        index = FilterIndex()
+        for records in [[{"k": i}] for i in range(2 * FilterIndex.MAX_SEEN)]:
+            index.filter(records, "k", "==", 0)
+        self.assertEqual(len(index._seen), FilterIndex.MAX_SEEN)
+
+    def test_filters_in_path(self):
+        with Assertable({"bands": [{"band": "Cream", "year": 1966},
+                                   {"band": "Deep Purple", "year": 1968},
+                                   {"band": "Pink Floyd", "year": 1965, "members": 5},
+                                   {"band": "Led Zeppelin"}]}) as in_bands:
+            for _ in range(2):
+                in_bands.every(["bands", ("year", "<", 1967), "band"]).is_not("Deep Purple")
+                in_bands(["bands", ("year", ">=", 1966), "band"]).is_(["Cream", "Deep Purple"])
+                in_bands.one(["bands", ("band", "in", ["Cream", "Queen"]), "year"]).is_(1966)
+                in_bands.one(["bands", ("band", "~", "^Led"), "band"]).is_("Led Zeppelin")
+                in_bands(["bands", ("members", "present", True), "band"]).is_(["Pink Floyd"])
+                in_bands(["bands", ("year", "present", False)]).has_length(1)
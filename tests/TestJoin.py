@@ -0,0 +1,106 @@
+import operator
+from unittest import TestCase
+from conssert import Assertable
+from conssert.join import key_set, key_getter, hash_table, group_counts
+from conssert.navigate import MISSING
+
+
+class TestJoin(TestCase):
+
+    shop = {"users": [{"id": 1, "country": "ES", "tags": ["a"]},
+                      {"id": 2, "country": "FR", "tags": ["b"]},
+                      {"id": 3, "country": "ES", "tags": ["a", "b"]}],
+            "orders": [{"id": 10, "user_id": 1, "country": "ES", "tags": ["a"]},
+                       {"id": 11, "user_id": 3, "country": "ES", "tags": ["a", "b"]},
+                       {"id": 12, "user_id": 3, "country": "ES", "tags": ["a"]}]}
+
+    def test_key_getter(self):
+        by_id = key_getter("id")
+        by_country_and_tags = key_getter(["country", "tags"])
+        self.assertEqual(by_id({"id": 1}), 1)
+        self.assertIs(by_id({"name": 1}), MISSING)
+        self.assertIs(by_id(1), MISSING)
+        self.assertEqual(by_country_and_tags(self.shop["users"][2]), ("ES", ("a", "b")))
+        self.assertIs(by_country_and_tags({"country": "ES"}), MISSING)
+        self.assertEqual(key_set([[1], [1], {"a": 2}, 3]), set([(1,), (("a", 2),), 3]))
+
+    def test_hash_table(self):
+        table = hash_table(self.shop["orders"] + [{"id": 13}], key_getter("user_id"))
+        self.assertEqual(sorted(table.keys()), [1, 3])
+        self.assertEqual([order["id"] for order in table[3]], [11, 12])
+
+    def test_group_counts(self):
+        self.assertEqual(group_counts(self.shop["orders"] + [{"id": 13}], key_getter("user_id")),
+                         {1: 1, 3: 2})
+        self.assertEqual(group_counts(self.shop["users"], key_getter(["country", "tags"])),
+                         {("ES", ("a",)): 1, ("FR", ("b",)): 1, ("ES", ("a", "b")): 1})
+
+    def test_references(self):
+        with Assertable(self.shop) as in_shop:
+            in_shop.references("orders user_id", "users id")
+            in_shop.references("orders country", "users country")
+            in_shop.references("orders tags", "users tags")
+            self.assertRaises(AssertionError, in_shop.references, "users id", "orders user_id")
+            self.assertRaises(AssertionError, in_shop.references, "orders id", "users id")
+
+        with Assertable(self.shop) as in_shop:
+            try:
+                in_shop.references("users id", "orders user_id")
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("1 elements not verifying it", str(error))
+                self.assertIn("('users', 1, 'id')", str(error))
+
+    def test_matches_join(self):
+        same_country = lambda left, right: left["country"] == right["country"]
+        with Assertable(self.shop) as in_shop:
+            in_shop.matches_join("orders", "users", "user_id", right_on="id")
+            in_shop.matches_join("orders", "users", "user_id", right_on="id", check=same_country)
+            in_shop.matches_join("orders", "users", ["country", "tags"])
+            in_shop.matches_join("users", "users", "country", check=same_country)
+            self.assertRaises(AssertionError, in_shop.matches_join, "orders", "users", "id")
+            self.assertRaises(AssertionError, in_shop.matches_join, "users", "orders", "id",
+                              right_on="user_id")
+            self.assertRaises(AssertionError, in_shop.matches_join, "orders", "users", "user_id",
+                              right_on="id", check=lambda order, user: order["id"] < 12)
+
+    def test_big_joins(self):
+        size = 100000
+        data = {"users": [{"id": i} for i in xrange(size)],
+                "orders": [{"id": i, "user_id": (i * 7) % size} for i in xrange(size)]}
+        with Assertable(data) as in_data:
+            in_data.references("orders user_id", "users id")
+            in_data.matches_join("orders", "users", "user_id", right_on="id")
+        data["orders"].append({"id": size, "user_id": size})
+        with Assertable(data) as in_data:
+            self.assertRaises(AssertionError, in_data.references, "orders user_id", "users id")
+
+    def test_unique_by(self):
+        accounts = [{"tenant": "t1", "email": "a@x.com", "group_id": 1},
+                    {"tenant": "t1", "email": "b@x.com", "group_id": 1},
+                    {"tenant": "t2", "email": "a@x.com", "group_id": 2},
+                    {"tenant": "t2", "email": "b@x.com", "group_id": 2},
+                    {"email": "b@x.com"}]
+        with Assertable({"accounts": accounts}) as in_accounts:
+            in_accounts.every("accounts").is_unique_by("tenant", "email")
+            in_accounts.every("accounts").is_unique_by("tenant", "email", "group_id")
+            self.assertRaises(AssertionError, in_accounts.every("accounts").is_unique_by, "email")
+            self.assertRaises(AssertionError, in_accounts.every("accounts").is_unique_by,
+                              "tenant", "group_id")
+            try:
+                in_accounts.every("accounts").is_unique_by("email")
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("2 keys repeated", str(error))
+                self.assertIn("('b@x.com',): 3", str(error))
+
+    def test_group_sizes(self):
+        members = [{"group_id": i % 3, "role": "admin" if i < 3 else "user"} for i in xrange(9)]
+        with Assertable({"members": members}) as in_members:
+            in_members.every("members").group_sizes_are("group_id", 3)
+            in_members.every("members").group_sizes_are(["group_id", "role"], 2, cmp=operator.le)
+            in_members.every("members").group_sizes_are("role", 3, cmp=operator.ge)
+            self.assertRaises(AssertionError, in_members.every("members").group_sizes_are,
+                              "group_id", 2)
+            self.assertRaises(AssertionError, in_members.every("members").group_sizes_are,
+                              "role", 3)
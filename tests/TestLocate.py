@@ -0,0 +1,68 @@
+from unittest import TestCase
+import operator
+from conssert import Assertable, split_and_reduce
+from conssert.locate import locate, item_locations
+
+
+class TestLocate(TestCase):
+
+    def setUp(self):
+        self.bands = {"bands": [{"band": "Cream",
+                                 "members": ["Bruce", "Clapton", "Baker"],
+                                 "albums": [{"title": "Fresh Cream", "year": 1966},
+                                            {"title": "Disraeli Gears", "year": 1967}]},
+                                {"band": "Deep Purple",
+                                 "members": ["Blackmore", "Paice", "Gillan"],
+                                 "albums": [{"title": "Machine Head", "year": 1972,
+                                             "uk chart": 1}]}]}
+
+    def _resolve(self, loc):
+        if isinstance(loc, list):
+            return [self._resolve(item_loc) for item_loc in loc]
+        node = self.bands
+        for key in loc:
+            node = node[key]
+        return node
+
+    def test_locations_resolve_to_the_selection(self):
+        for path in ["bands", "bands members", "bands albums year", "bands albums *", "bands *",
+                     "**", "..title", "bands ..year", ["bands", ("band", "Cream"), "albums"],
+                     ["bands", "albums", ("year", ">", 1966), "title"]]:
+            path = split_and_reduce([path])
+            selection = Assertable._selection(self.bands, path, False)
+            obj, loc = locate(self.bands, path, False)
+            self.assertEqual(obj, selection)
+            self.assertEqual(self._resolve(loc), obj)
+            if isinstance(obj, list) and not isinstance(loc, list):
+                self.assertEqual([self._resolve(item_loc) for item_loc in
+                                  item_locations(obj, loc)], obj)
+
+    def test_failure_locations(self):
+        with Assertable(self.bands) as in_bands:
+            try:
+                in_bands.every("bands albums year").has(1967, cmp=operator.lt)
+            except AssertionError as error:
+                self.assertTrue("('bands', 0, 'albums', 1, 'year')\n"
+                                "                    ('bands', 1, 'albums', 0, 'year')"
+                                in str(error))
+            else:
+                self.fail("validation did not fail")
+
+            try:
+                in_bands.no("bands members").has("Paice")
+            except AssertionError as error:
+                self.assertTrue("('bands', 1, 'members')" in str(error))
+                self.assertTrue("('bands', 0, 'members')" not in str(error))
+            else:
+                self.fail("validation did not fail")
+
+    def test_failure_locations_with_mixed_types(self):
+        # the elements after the one deciding the verification are not compared by it
+        with Assertable({"names": ["ab", None, 3]}) as in_names:
+            try:
+                in_names.no("names").matches("a")
+            except AssertionError as error:
+                self.assertTrue("('names', 0)" in str(error))
+            else:
+                self.fail("validation did not fail")
+            self.assertRaises(AssertionError, in_names.one("names").has, 4, cmp=operator.lt)
@@ -1,5 +1,8 @@
 from unittest import TestCase
-from conssert import Assertable, to_dict
+from collections import OrderedDict, namedtuple, Mapping
+from conssert import Assertable, to_dict, register_adapter, unregister_adapter, kind, LIST, DICT, \
+    TUPLE, SET, STRING, COLLECTION, walk, expand_last_level, find_key, diff, MISSING, to_tuples, \
+    unique, Canonicalizer
 
 
 class TestNavigate(TestCase):
@@ -63,6 +66,90 @@ class TestNavigate(TestCase):
         with Assertable(x) as cyclic_graph:
             cyclic_graph.one('z').is_({'x': {}})
 
+    def test_to_dict_adapters(self):
+        Point = namedtuple("Point", "x y")
+
+        class Slotted(object):
+            __slots__ = ("a", "_b", "c", "unset")
+
+            def __init__(self):
+                self.a, self._b, self.c = Point(1, 2), 2, len
+
+        class Record(object):
+            __dataclass_fields__ = OrderedDict([("id", None), ("_secret", None), ("tags", None)])
+
+            def __init__(self, id, tags):
+                self.id, self._secret, self.tags = id, "s", tags
+
+        class Row(Mapping):
+            def __init__(self, **columns):
+                self._columns = columns
+
+            def __getitem__(self, key):
+                return self._columns[key]
+
+            def __iter__(self):
+                return iter(self._columns)
+
+            def __len__(self):
+                return len(self._columns)
+
+        class Message(object):
+            def __init__(self, payload):
+                self.payload = payload
+
+        class Payload(Message):
+            pass
+
+        class Ordered(Message):
+            pass
+
+        register_adapter(Message, lambda message: {"fields": message.payload})
+        try:
+            self.assertEqual(to_dict([Point(1, [Point(2, 3)]), Slotted(),
+                                      Record(7, (i for i in [1])), Row(name=OrderedDict(a=1)),
+                                      Message(set([Point(0, 0)]))]),
+                             [{"x": 1, "y": [{"x": 2, "y": 3}]},
+                              {"a": {"x": 1, "y": 2}},
+                              {"id": 7, "tags": [1]},
+                              {"name": {"a": 1}},
+                              {"fields": [{"x": 0, "y": 0}]}])
+
+            self.assertEqual(to_dict(Payload(1)), {"fields": 1})
+            register_adapter(Payload, lambda payload: [payload.payload])
+            self.assertEqual(to_dict([Payload(1), Message(2)]), [[1], {"fields": 2}])
+
+            register_adapter(Ordered, lambda ordered: OrderedDict([("p", ordered.payload)]))
+            converted = to_dict(Ordered((Point(1, 2),)))
+            self.assertIs(type(converted), dict)
+            self.assertEqual(converted, {"p": [{"x": 1, "y": 2}]})
+        finally:
+            for cls in [Message, Payload, Ordered]:
+                unregister_adapter(cls)
+        self.assertEqual(to_dict(Message(1)), {"payload": 1})
+
+    def test_kinds(self):
+        class Old:
+            pass
+
+        class Words(str):
+            pass
+
+        self.assertEqual([kind(obj) for obj in [[], {}, (), set(), "", u"", Words(""),
+                                                OrderedDict(), namedtuple("P", "x")(1)]],
+                         [LIST, DICT, TUPLE, SET, STRING, STRING, STRING, DICT, TUPLE])
+        self.assertEqual([kind(obj) for obj in [None, 1, 1.5, frozenset(), Old(), Old]], [0] * 6)
+        self.assertTrue(all(kind(obj) & COLLECTION for obj in [[], {}, (), set()]))
+
+    def test_traversals(self):
+        tree = {"a": [1, {"b": 2, "c": [{"b": 3}]}], "d": {"b": {"b": 4}}}
+        self.assertEqual(sorted(walk(tree)), [["a", 1], ["a", "b", 2], ["a", "c", "b", 3],
+                                              ["d", "b", "b", 4]])
+        self.assertEqual(sorted(expand_last_level(tree)), [1, 2, 3, 4])
+        self.assertEqual(expand_last_level(5), [5])
+        self.assertEqual(sorted(find_key(tree, "b")), [2, 3, 4, {"b": 4}])
+        self.assertEqual(find_key([tree, "b"], "z"), [])
+
     def test_skip_privates_and_callables(self):
         class X:
             pass
@@ -73,4 +160,41 @@ class TestNavigate(TestCase):
         x.c = list.__add__
 
         with Assertable(x) as xdict:
-            xdict().is_({'a': 1})
\ No newline at end of file
+            xdict().is_({'a': 1})
+
+    def test_diff(self):
+        expected = {"a": 1,
+                    "b": {"c": [1, 2]},
+                    "users": [{"id": 2, "name": "Bob"}, {"id": 1, "name": "Alice"}]}
+        actual = {"a": 1,
+                  "b": {"c": [3, 2, 1], "d": 4},
+                  "users": [{"id": 1, "name": "Alice", "age": 31},
+                            {"id": 2, "name": "Bob", "age": 42}]}
+        self.assertEqual(diff(expected, actual, key="id"), [])
+        self.assertEqual(diff(expected, actual), [])
+        self.assertEqual(sorted(diff(actual, expected, key="id")),
+                         [(["b", "c", 0], 3, MISSING),
+                          (["b", "d"], 4, MISSING),
+                          (["users", 0, "age"], 31, MISSING),
+                          (["users", 1, "age"], 42, MISSING)])
+
+        actual["users"][1]["name"] = "Robert"
+        self.assertEqual(diff(expected, actual, key="id"), [(["users", 0, "name"], "Bob", "Robert")])
+        self.assertEqual(diff(expected, actual), [(["users", 0], {"id": 2, "name": "Bob"}, MISSING)])
+        self.assertEqual(diff([1, 1], [1]), [([1], 1, MISSING)])
+        # {"a": 1} must not take the only item containing {"a": 1, "b": 2}
+        self.assertEqual(diff([{"a": 1}, {"a": 1, "b": 2}], [{"a": 1, "b": 2, "x": 0},
+                                                             {"a": 1, "c": 3}]), [])
+        self.assertEqual(diff([{"a": 1, "b": 2}, {"a": 1}, {"b": 2}],
+                              [{"a": 1, "c": 3}, {"a": 1, "b": 2}]),
+                         [([2], {"b": 2}, MISSING)])
+
+    def test_canonical_forms(self):
+        shared = {"tags": ["a", "b"], "meta": OrderedDict([("k", 1)])}
+        tree = [shared, {"x": shared, "y": (1, set([2])), u"z": None}, "abc", 3.5]
+        canonical = Canonicalizer()
+        self.assertEqual(dict(to_tuples(shared)), {"meta": (("k", 1),), "tags": ("a", "b")})
+        self.assertEqual(canonical(tree), to_tuples(tree))
+        self.assertIs(canonical(shared), canonical(tree)[0])
+        for col in [tree, shared, "abc", {1: "a"}, [[1], [1], [2]]]:
+            self.assertEqual(unique(col, canonical), unique(col))
@@ -0,0 +1,106 @@
+import json
+import operator
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase
+from conssert import Assertable
+from conssert.sqlite import load, load_jsonl, SQLiteSelector
+
+
+class TestSQLite(TestCase):
+
+    albums = [{"band": "Pink Floyd", "year": 1979, "title": "The Wall", "genres": ["Rock"],
+               "label": {"name": "Harvest", "country": "UK"}},
+              {"band": "Led Zeppelin", "year": 1969, "title": "II", "genres": ["Rock", "Blues"],
+               "label": {"name": "Atlantic", "country": "US"}},
+              {"band": "The Doors", "year": 1967, "title": "The Doors", "genres": [],
+               "label": {"name": "Elektra"}, "live": False},
+              {"band": "Pink Floyd", "year": 1973, "title": None, "genres": ["Prog"],
+               "label": {"name": "Harvest", "country": "UK"}, "live": True}]
+
+    validations = [("every", "year", "is_not", [None]),
+                   ("every", "year", "is_", [1979]),
+                   ("every", "title", "is_not", [None]),
+                   ("every_existent", "live", "is_not", [None]),
+                   ("every_existent", "live", "is_", [False]),
+                   ("some", "live", "is_", [True]),
+                   ("no", "band", "is_", ["Queen"]),
+                   ("no", "band", "is_", ["The Doors"]),
+                   (("exactly", 2), "band", "is_", ["Pink Floyd"]),
+                   (("at_most", 1), "band", "is_", ["Pink Floyd"]),
+                   ("every", "band", "matches", ["^[A-Z]"]),
+                   ("every", "band", "matches", ["^The"]),
+                   ("every", "band", "has_length", [6], {"cmp": operator.gt}),
+                   ("every", "band", "has_length", [10], {"cmp": operator.ge}),
+                   ("every", "genres", "has_length", [2], {"cmp": operator.le}),
+                   ("one", "genres", "has_length", [0]),
+                   ("every", "label", "has_length", [2]),
+                   ("every", "genres", "is_", [["Rock"]]),
+                   ("every", "label name", "is_not", ["Columbia"]),
+                   ("every_existent", "label country", "is_", ["UK"]),
+                   (("exactly", 3), "label country", "is_not_none", []),
+                   ("every", [("year", ">", 1970), "band"], "is_", ["Pink Floyd"]),
+                   ("every", [("year", "<", 1970), "band"], "is_", ["Pink Floyd"]),
+                   ("one", [("band", "Pink Floyd"), "title"], "is_", [None]),
+                   ("every", [("band", "in", ["The Doors"]), "year"], "is_", [1967]),
+                   ("every", [("band", "not in", ["The Doors"]), "year"], "is_not", [1967]),
+                   ("every", [("live", "present", False), "year"], "has", [1970],
+                    {"cmp": operator.ge}),
+                   ("every", [("title", "~", "^The"), ("year", "!=", 1979), "band"], "is_",
+                    ["The Doors"]),
+                   ("every", "year", "has", [1960], {"cmp": operator.gt}),
+                   ("every", "**", "is_not", ["Columbia"]),
+                   ("every", "genres", "has_no_duplicates", []),
+                   (None, "year", "has_length", [4])]
+
+    def test_same_results_as_records(self):
+        expected = Assertable(self.albums).verify_all(self.validations, raise_errors=False)
+        with Assertable.from_sqlite(load(self.albums)) as in_db:
+            results = in_db.verify_all(self.validations, raise_errors=False)
+        self.assertEqual([error is None for error in results],
+                         [error is None for error in expected])
+        self.assertEqual([error is None for error in results],
+                         [True, False, False, True, False, True, True, False, True, False, True,
+                          False, True, False, True, True, False, False, True, False, True, True,
+                          False, True, True, True, False, True, True, True, True, True])
+
+    def test_sql_selections(self):
+        with Assertable.from_sqlite(load(self.albums)) as in_db:
+            self.assertIsInstance(in_db.every("label name"), SQLiteSelector)
+            self.assertIsInstance(in_db.every([("year", ">", 1970), "band"]), SQLiteSelector)
+            self.assertNotIsInstance(in_db.every("**"), SQLiteSelector)
+            self.assertNotIsInstance(in_db("band"), SQLiteSelector)
+            self.assertRaises(AssertionError, in_db.every, "label country")
+            try:
+                in_db.every("label name").is_("Harvest")
+                self.fail()
+            except AssertionError as error:
+                self.assertIn("expected = 4, got = 2", str(error))
+                self.assertIn("(1, 'label', 'name')", str(error))
+                self.assertNotIn("(0, 'label', 'name')", str(error))
+
+    def test_loaders(self):
+        directory = tempfile.mkdtemp()
+        try:
+            jsonl = os.path.join(directory, "albums.jsonl")
+            with open(jsonl, "w") as f:
+                f.write("\n".join(json.dumps(album) for album in self.albums) + "\n\n")
+            database = os.path.join(directory, "albums.db")
+            load_jsonl(jsonl, database, table="albums").close()
+            with Assertable.from_sqlite(database, table="albums") as in_db:
+                in_db.every("year").has(1960, cmp=operator.gt)
+                in_db.exactly(4, "band").is_not_none()
+                in_db().has_length(4)
+            self.assertRaises(sqlite3.Error, load_jsonl, ["{}", "{"])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_big_tables(self):
+        size = 50000
+        records = ({"id": i, "user": {"mail": "user{}@x.com".format(i)}} for i in xrange(size))
+        with Assertable.from_sqlite(load(records)) as in_db:
+            in_db.every("user mail").matches("^user[0-9]+@x.com$")
+            in_db.every([("id", ">=", size - 10), "user", "mail"]).has_length(15)
+            in_db.no([("id", "in", [-1, size]), "id"]).is_not_none()
@@ -0,0 +1,27 @@
+from unittest import TestCase
+from conssert.sampling import reservoir_sample, sample_size, wilson_interval
+
+
+class TestSampling(TestCase):
+
+    def test_reservoir_sample(self):
+        sampled, population = reservoir_sample(xrange(1000), 10, seed=7)
+        self.assertEqual(population, 1000)
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled, sorted(set(sampled)))
+        self.assertEqual(reservoir_sample(iter(xrange(1000)), 10, seed=7)[0], sampled)
+        self.assertEqual(reservoir_sample([1, 2], 10), ([1, 2], 2))
+
+    def test_sample_size(self):
+        self.assertEqual(sample_size(0.01), 299)
+        self.assertEqual(sample_size(0.001, 0.99), 4603)
+        for error_rate, confidence in [(0, 0.95), (1, 0.95), (-0.1, 0.95), (0.01, 0), (0.01, 1)]:
+            self.assertRaises(ValueError, sample_size, error_rate, confidence)
+
+    def test_wilson_interval(self):
+        lower, upper = wilson_interval(100, 100)
+        self.assertAlmostEqual(upper, 1.0)
+        self.assertTrue(0.96 < lower < 0.97)
+        lower, upper = wilson_interval(50, 100)
+        self.assertTrue(lower < 0.5 < upper)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
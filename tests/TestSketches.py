@@ -0,0 +1,44 @@
+from unittest import TestCase
+from conssert import Assertable
+from conssert.sketches import HyperLogLog, BloomFilter, duplicates
+
+
+class TestSketches(TestCase):
+
+    def test_hyperloglog(self):
+        for cardinality in [0, 10, 1000, 20000]:
+            sketch = HyperLogLog(0.01)
+            for i in xrange(cardinality):
+                sketch.add({"id": i % (cardinality or 1), "tags": ["a", "b"]})
+                sketch.add(i)
+            self.assertTrue(abs(sketch.count() - 2 * cardinality) <= 0.05 * cardinality + 1)
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(10000, 0.01)
+        false_positives = sum(bloom.add(i) for i in xrange(10000))
+        self.assertTrue(false_positives < 200)
+        self.assertTrue(all(bloom.add(i) for i in xrange(10000)))
+
+    def test_duplicates(self):
+        records = [{"id": i, "tags": [i % 7]} for i in xrange(2000)]
+        self.assertEqual(duplicates(records), {})
+        records.extend([{"id": 5, "tags": [5]}, {"id": 5, "tags": [5]}, {"id": 8, "tags": [1]}])
+        self.assertEqual(duplicates(records, 0.1),
+                         {(("id", 5), ("tags", (5,))): 3, (("id", 8), ("tags", (1,))): 2})
+
+    def test_approximate_assertions(self):
+        with Assertable({"mails": ["a@x.com", "b@x.com", "c@x.com", "a@x.com"]}) as in_mails:
+            self.assertRaises(AssertionError, in_mails.every("mails").has_no_duplicates)
+            self.assertRaises(AssertionError, in_mails.every("mails").has_no_duplicates,
+                              approximate=True)
+            in_mails.every_existent("mails").approx_distinct_count(3)
+            in_mails("mails").approx_distinct_count(3, error_rate=0.05)
+            self.assertRaises(AssertionError, in_mails("mails").approx_distinct_count, 4)
+
+        with Assertable(range(3000)) as in_numbers:
+            in_numbers.every().has_no_duplicates(approximate=True)
+            in_numbers.every_existent().approx_distinct_count(3000)
+
+        with Assertable(range(3000) + [1234]) as in_numbers:
+            self.assertRaises(AssertionError, in_numbers.every().has_no_duplicates,
+                              approximate=True)
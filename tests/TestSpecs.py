@@ -0,0 +1,113 @@
+import json
+from StringIO import StringIO
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+from conssert import specs
+from conssert.__main__ import main
+
+
+class TestSpecs(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.users = {"users": [{"name": "Alice", "mails": ["alice@gmail.com"], "age": 31},
+                                {"name": "Bob", "mails": ["bob@gmail.com"], "age": 42}]}
+        self.spec = {"prefix": "users",
+                     "validations": [{"every": "name", "is_not_none": []},
+                                     {"every": "mails", "matches": ["[^@]+@[^@]+"]},
+                                     {"exactly": 1, "path": "name", "is_": "Bob"},
+                                     {"every": "age", "has": [18], "cmp": "gt"},
+                                     {"select": "", "has_length": [2]}]}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            json.dump(content, f)
+        return path
+
+    def test_compile_and_verify(self):
+        plan = specs.compile_spec(self.spec)
+        self.assertEqual(plan.verify(self.users), [None] * 5)
+
+        self.users["users"][0]["age"] = 12
+        results = plan.verify(self.users, raise_errors=False)
+        self.assertTrue(isinstance(results[3], AssertionError))
+        self.assertRaises(AssertionError, plan.verify, self.users)
+
+    def test_invalid_validation(self):
+        self.assertRaises(ValueError, specs.compile_spec,
+                          {"validations": [{"every": "name", "some": "name", "is_": 1}]})
+        self.assertRaises(ValueError, specs.compile_spec, {"validations": [{"every": "name"}]})
+
+    def test_load_cached_by_mtime(self):
+        spec_path = self._write("spec.json", self.spec)
+        plan = specs.load(spec_path)
+        self.assertIs(specs.load(spec_path), plan)
+
+        self.spec["validations"].pop()
+        self._write("spec.json", self.spec)
+        os.utime(spec_path, (0, 0))
+        self.assertEqual(len(specs.load(spec_path).validations), 4)
+
+    def test_python_module_spec(self):
+        spec_path = os.path.join(self.tmp_dir, "users_spec.py")
+        with open(spec_path, 'w') as f:
+            f.write("prefix = 'users'\n"
+                    "validations = [('every', 'name', 'is_not_none', []),\n"
+                    "               (('exactly', 1), 'name', 'is_', ['Bob'])]\n")
+        self.assertEqual(specs.load(spec_path).verify(self.users), [None, None])
+
+        # a spec named as a module doesn't replace it
+        json_path = os.path.join(self.tmp_dir, "json.py")
+        with open(json_path, 'w') as f:
+            f.write("validations = [('every', 'users name', 'is_not_none', [])]\n")
+        self.assertEqual(specs.load(json_path).verify(self.users), [None])
+        self.assertIs(sys.modules["json"], json)
+        self.assertFalse(hasattr(json, "validations"))
+
+    def test_main(self):
+        spec_path = self._write("spec.json", self.spec)
+        self._write("ok.json", self.users)
+        self.users["users"].append({"name": "Bob"})
+        self._write("ko.json", self.users)
+        with open(os.path.join(self.tmp_dir, "broken.json"), 'w') as f:
+            f.write("{")
+
+        for workers in ["1", "2"]:
+            out, err = StringIO(), StringIO()
+            self.assertEqual(main([spec_path, os.path.join(self.tmp_dir, "*o*.json"),
+                                   "--workers", workers], out, err), 1)
+            results = sorted((json.loads(line) for line in out.getvalue().splitlines()),
+                             key=lambda result: result["file"])
+            self.assertEqual([os.path.basename(result["file"]) for result in results],
+                             ["broken.json", "ko.json", "ok.json"])
+            self.assertEqual([result["passed"] for result in results], [False, False, True])
+            self.assertEqual([failure["validation"] for failure in results[1]["failures"]],
+                             [1, 2, 3, 4])
+            self.assertEqual(err.getvalue(), "3 files, 1 passed, 2 failed\n")
+
+        out, err = StringIO(), StringIO()
+        self.assertEqual(main([spec_path, os.path.join(self.tmp_dir, "ok.json")], out, err), 0)
+
+    def test_main_with_unexpected_errors(self):
+        names_path = self._write("names.json", ["x", "y"])
+        ok_path = self._write("ok.json", [{"name": "Alice"}])
+        for index, validation in enumerate(
+                [{"every": "name", "is_not_none": []},
+                 {"every": "name", "has_length": [3], "property": "unknown"},
+                 {"every": "name", "has_length": [3], "cmp": "unknown"}]):
+            spec_path = self._write("spec{}.json".format(index), {"validations": [validation]})
+            out, err = StringIO(), StringIO()
+            self.assertEqual(main([spec_path, names_path, ok_path, "--workers", "1"], out, err),
+                             1)
+            results = [json.loads(line) for line in out.getvalue().splitlines()]
+            self.assertEqual(len(results), 2)
+            self.assertEqual([result["passed"] for result in results], [False, index == 0])
+            self.assertIn("Error: ", results[0]["error"])
+            self.assertEqual(err.getvalue().split(",")[0], "2 files")
@@ -0,0 +1,147 @@
+import bz2
+import gzip
+import json
+import operator
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import TestCase, skipIf
+from conssert import Assertable
+from conssert.streams import read_records, StreamAssertable
+from conssert.sqlite import load
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestStreams(TestCase):
+
+    records = [{"id": i, "user": {"mail": "user{}@x.com".format(i)}, "tags": ["a"] * (i % 3)}
+               for i in range(250)]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _jsonl(self):
+        return "".join(json.dumps(record) + "\n" for record in self.records)
+
+    def _write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_jsonl(self):
+        path = self._write("records.jsonl", self._jsonl())
+        self.assertEqual(list(read_records(path, buffer_size=100)), self.records)
+        self.assertEqual(list(read_records(BytesIO(self._jsonl()[:-1] + "\n\n"), "jsonl")),
+                         self.records)
+        self.assertRaises(ValueError, list, read_records(BytesIO(self._jsonl()), "xml"))
+        # records spanning many blocks
+        long_records = [{"id": 1, "text": "x" * 5000}, {"id": 2}]
+        data = "".join(json.dumps(record) + "\n" for record in long_records)
+        self.assertEqual(list(read_records(BytesIO(data), "jsonl", buffer_size=7)), long_records)
+        self.assertEqual(list(read_records(BytesIO(bz2.compress(data)), "jsonl", "bz2",
+                                           buffer_size=7)), long_records)
+        # a .json file holds a single document, not JSON Lines
+        self.assertRaises(ValueError, list, read_records(self._write("records.json", "[]")))
+        self.assertRaises(ValueError, list, read_records(BytesIO('{"id": 1}\n{"id"\n'), "jsonl"))
+
+    def test_compressed(self):
+        compressed = BytesIO()
+        # concatenated gzip streams are read as a single one
+        for half in (self._jsonl()[:1000], self._jsonl()[1000:]):
+            with gzip.GzipFile(fileobj=compressed, mode="wb") as f:
+                f.write(half)
+        gzipped = self._write("records.jsonl.gz", compressed.getvalue())
+        self.assertEqual(list(read_records(gzipped, buffer_size=64)), self.records)
+
+        bzipped = self._write("records.jsonl.bz2", bz2.compress(self._jsonl()))
+        self.assertEqual(list(read_records(bzipped, buffer_size=64)), self.records)
+
+        # concatenated bz2 streams, also when a stream ends exactly with a block
+        first, second = bz2.compress(self._jsonl()[:1000]), bz2.compress(self._jsonl()[1000:])
+        for buffer_size in (len(first), 7, 1):
+            self.assertEqual(list(read_records(BytesIO(first + second), "jsonl", "bz2",
+                                               buffer_size=buffer_size)), self.records)
+
+    @skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        path = self._write("records.jsonl.zst", zstandard.ZstdCompressor().compress(self._jsonl()))
+        self.assertEqual(list(read_records(path, buffer_size=64)), self.records)
+
+    @skipIf(msgpack is None, "msgpack is not installed")
+    def test_msgpack(self):
+        data = b"".join(msgpack.packb(record, use_bin_type=True) for record in self.records)
+        path = self._write("records.msgpack.gz", gzip_bytes(data))
+        self.assertEqual(list(read_records(path, buffer_size=50)), self.records)
+
+    @skipIf(cbor2 is None, "cbor2 is not installed")
+    def test_cbor(self):
+        data = b"".join(cbor2.dumps(record) for record in self.records)
+        path = self._write("records.cbor", data)
+        self.assertEqual(list(read_records(path, buffer_size=50)), self.records)
+        self.assertEqual(list(read_records(BytesIO(b""), "cbor")), [])
+
+    def test_stream_validations(self):
+        validations = [("every", "user mail", "matches", ["^user[0-9]+@x.com$"]),
+                       ("every", "tags", "has_length", [2], {"cmp": operator.le}),
+                       ("every", "id", "is_not", [120]),
+                       ("every_existent", [("id", ">", 240), "tags"], "is_not", [[]]),
+                       ("no", "id", "is_", [-1]),
+                       ("some", "id", "is_", [249]),
+                       ("some", "id", "is_", [250]),
+                       ("every", "id", "sum_is", [sum(range(250))]),
+                       ("every", "id", "max_is", [250]),
+                       (None, "id", "min_is", [0]),
+                       ("every", "tags", "count_where", [lambda tags: not tags, 84]),
+                       ("every", "tags", "mean_between", [0.9, 1.1], {"property": len}),
+                       ("every", [("id", "<", 0), "id"], "mean_between", [0, 1])]
+        expected = Assertable(self.records).verify_all(validations, raise_errors=False)
+        results = StreamAssertable(iter(self.records), chunk_size=100).verify_all(
+            validations, raise_errors=False)
+        self.assertEqual([error is None for error in results],
+                         [error is None for error in expected])
+        self.assertEqual([error is None for error in results],
+                         [True, True, False, False, True, True, False, True, False, True, True,
+                          True, False])
+        self.assertIn("in records 100 to 199", str(results[2]))
+        self.assertIn("(20, 'id')", str(results[2]))
+        self.assertIn("max = 249", str(results[8]))
+        self.assertIn("mean of an empty selection", str(results[12]))
+
+        self.assertRaises(ValueError, StreamAssertable(self.records).verify_all,
+                          [("every", "id", "has_no_duplicates", [])])
+        self.assertRaises(ValueError, StreamAssertable(self.records).verify_all,
+                          [(("exactly", 1), "id", "is_", [1])])
+        self.assertRaises(AssertionError, StreamAssertable([]).verify_all,
+                          [("some", "id", "is_", [1])])
+
+    def test_sqlite_loading(self):
+        path = self._write("records.jsonl.gz", gzip_bytes(self._jsonl()))
+        with Assertable.from_sqlite(load(read_records(path))) as in_db:
+            in_db.every([("id", ">=", 200), "user", "mail"]).has_length(13)
+            in_db().has_length(250)
+
+
+def gzip_bytes(data):
+    compressed = BytesIO()
+    with gzip.GzipFile(fileobj=compressed, mode="wb") as f:
+        f.write(data)
+    return compressed.getvalue()